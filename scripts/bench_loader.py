@@ -0,0 +1,190 @@
+"""
+Raw Loader Benchmark
+====================
+Times the three stages of scripts/load_raw_to_postgres.py separately on a
+synthetic datalake (see generate_synthetic_datalake.py) or an existing one:
+
+    parse   reading partition files into message dicts
+    coerce  mapping messages onto raw table rows (batch or per record)
+    insert  writing the rows to PostgreSQL (COPY + merge, or execute_values)
+
+Every configuration loads into a freshly created table in its own schema
+(default: bench_raw), so the production raw schema is never touched. The
+JSON report (--output) lists one entry per configuration.
+
+Usage:
+    DATABASE_URL=postgresql://localhost/bench python scripts/bench_loader.py \\
+        --channels 10 --days 14 --messages 2000 --modes copy,insert --coerce batch,record
+    python scripts/bench_loader.py --path data --output bench_loader.json
+    python scripts/bench_loader.py --skip-insert
+"""
+
+import io
+import os
+import json
+import time
+import argparse
+import tempfile
+import itertools
+import contextlib
+from typing import List
+
+import psycopg2
+
+from generate_synthetic_datalake import add_generator_arguments, generate_datalake, generator_options
+
+
+def parse_list(value: str, cast) -> list:
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+
+def quiet(args):
+    # The loader reports progress with print(); keep it out of the timings
+    return contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def reset_schema(loader, conn):
+    # Drop and recreate the benchmark schema with an empty raw table
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {loader.RAW_SCHEMA} CASCADE")
+    conn.commit()
+    loader._known_partitions.clear()
+    loader._natural_key_columns = None
+    loader.ensure_raw_table(conn)
+
+
+def run_configuration(loader, conn, files: List[str], mode: str, coerce: str, args) -> dict:
+    parse_seconds = coerce_seconds = insert_seconds = 0.0
+    messages = rows_written = 0
+    if conn is not None:
+        with quiet(args):
+            reset_schema(loader, conn)
+
+    for fp in files:
+        started = time.perf_counter()
+        batch = list(loader.iter_file_messages(fp))
+        parse_seconds += time.perf_counter() - started
+        messages += len(batch)
+
+        started = time.perf_counter()
+        if mode == "insert":
+            rows = [loader.coerce_record(m) for m in batch]
+        elif coerce == "batch":
+            rows = list(loader.iter_coerced_rows(batch))
+        else:
+            rows = [tuple(r[c] for c in loader.RAW_COLUMNS) for r in map(loader.coerce_record, batch)]
+        coerce_seconds += time.perf_counter() - started
+
+        if conn is None:
+            continue
+        started = time.perf_counter()
+        with quiet(args):
+            if mode == "insert":
+                rows_written += loader.insert_records(conn, rows, batch_size=args.batch_size)
+            else:
+                rows_written += loader.copy_records(conn, rows, commit_every=args.commit_every)
+        insert_seconds += time.perf_counter() - started
+
+    table_rows = None
+    if conn is not None:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT count(*) FROM {loader.RAW_SCHEMA}.{loader.RAW_TABLE}")
+            table_rows = cur.fetchone()[0]
+        conn.commit()
+
+    total = parse_seconds + coerce_seconds + insert_seconds
+
+    def rate(seconds: float) -> float:
+        return round(messages / seconds, 1) if seconds > 0 else 0.0
+
+    return {
+        "mode": mode,
+        "coerce": coerce,
+        "files": len(files),
+        "messages": messages,
+        "bytes": sum(os.path.getsize(fp) for fp in files),
+        "parse_seconds": round(parse_seconds, 3),
+        "coerce_seconds": round(coerce_seconds, 3),
+        "insert_seconds": round(insert_seconds, 3) if conn is not None else None,
+        "total_seconds": round(total, 3),
+        "parse_messages_per_sec": rate(parse_seconds),
+        "coerce_messages_per_sec": rate(coerce_seconds),
+        "insert_rows_per_sec": rate(insert_seconds) if conn is not None else None,
+        "messages_per_sec": rate(total),
+        "rows_written": rows_written if conn is not None else None,
+        "table_rows": table_rows,
+    }
+
+
+def main(argv: List[str] = None) -> List[dict]:
+    parser = argparse.ArgumentParser(description="Benchmark the parse, coerce and insert stages of the raw loader")
+    parser.add_argument("--path", type=str, default="",
+                        help="Benchmark this data directory instead of a generated one")
+    add_generator_arguments(parser)
+    parser.add_argument("--modes", type=str, default="copy,insert", help="Comma-separated load modes to compare")
+    parser.add_argument("--coerce", type=str, default="batch,record",
+                        help="Comma-separated coercion paths to compare (copy mode; insert always uses record)")
+    parser.add_argument("--commit-every", type=int, default=100_000, help="copy mode: rows per transaction")
+    parser.add_argument("--batch-size", type=int, default=1000, help="insert mode: rows per execute_values batch")
+    parser.add_argument("--schema", type=str, default="bench_raw",
+                        help="Schema to load into; dropped and recreated per configuration (default: bench_raw)")
+    parser.add_argument("--skip-insert", action="store_true", help="Only time parse and coerce; no database needed")
+    parser.add_argument("--output", type=str, default="", help="Write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep the loader's progress output")
+    args = parser.parse_args(argv)
+
+    if args.schema == "raw":
+        parser.error("refusing to benchmark into the production raw schema")
+    # RAW_SCHEMA is read when the loader is imported
+    os.environ["RAW_SCHEMA"] = args.schema
+    import load_raw_to_postgres as loader
+
+    with contextlib.ExitStack() as stack:
+        if args.path:
+            base_path = args.path
+        else:
+            base_path = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench_loader_"))
+            summary = generate_datalake(base_path, **generator_options(args))
+            print(f"Generated {summary['messages']} messages in {summary['files']} files "
+                  f"({summary['bytes'] / 1024 / 1024:.1f} MB)")
+        files = [fp for fp, _ in loader.iter_json_files(os.path.join(base_path, "raw", "telegram_messages"))]
+        if not files:
+            parser.error(f"no partition files under {base_path}")
+
+        conn = None
+        if not args.skip_insert:
+            conn = psycopg2.connect(loader.POSTGRES_DSN)
+            stack.callback(conn.close)
+
+        results = []
+        configurations = []
+        for mode, coerce in itertools.product(parse_list(args.modes, str.strip), parse_list(args.coerce, str.strip)):
+            # insert mode always coerces record by record
+            configuration = (mode, "record" if mode == "insert" else coerce)
+            if configuration not in configurations:
+                configurations.append(configuration)
+        for mode, coerce in configurations:
+            result = run_configuration(loader, conn, files, mode, coerce, args)
+            results.append(result)
+            insert = (f"insert {result['insert_seconds']:>7.2f}s" if result["insert_seconds"] is not None
+                      else "insert  skipped")
+            print(
+                f"mode={mode:<6} coerce={coerce:<6} {result['messages']:>8} msgs  "
+                f"parse {result['parse_seconds']:>7.2f}s  coerce {result['coerce_seconds']:>7.2f}s  {insert}  "
+                f"{result['messages_per_sec']:>9.1f} msg/s"
+            )
+
+        if conn is not None:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {loader.RAW_SCHEMA} CASCADE")
+            conn.commit()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Report written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
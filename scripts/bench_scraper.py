@@ -0,0 +1,157 @@
+"""
+Scraper Throughput Benchmark
+============================
+Drives scrape_all_channels() from scripts/telegram.py against the offline
+ReplayTelegramClient and reports messages/sec and peak Python memory for
+every combination of the given settings. Nothing touches the network; each
+configuration writes into its own temporary data directory.
+
+Usage:
+    python scripts/bench_scraper.py --channels 4 --messages 2000 \\
+        --concurrency 1,4 --download-workers 1,4 --media-latency 0.05 --sinks ndjson,parquet
+    python scripts/bench_scraper.py --replay-path data --replay-date 2024-01-31
+    python scripts/bench_scraper.py --output bench_scraper.json
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import itertools
+import tracemalloc
+from typing import List
+
+# scripts/telegram.py validates credentials at import time; the replay client
+# never talks to Telegram, so placeholders are enough.
+os.environ.setdefault("Tg_API_ID", "0")
+os.environ.setdefault("Tg_API_HASH", "offline-benchmark")
+
+from telegram import logger, scrape_all_channels
+from replay_client import ReplayTelegramClient, synthetic_history
+
+
+def parse_list(value: str, cast) -> list:
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+
+def build_client(args) -> ReplayTelegramClient:
+    options = dict(
+        page_latency=args.page_latency,
+        media_latency=args.media_latency,
+        flood_every=args.flood_every,
+        flood_seconds=args.flood_seconds,
+    )
+    if args.replay_path:
+        return ReplayTelegramClient.from_datalake(args.replay_path, args.replay_date, **options)
+    histories = {
+        f"@bench_{i}": synthetic_history(
+            args.messages,
+            photo_ratio=args.photo_ratio,
+            repost_ratio=args.repost_ratio,
+            seed=i,
+        )
+        for i in range(args.channels)
+    }
+    return ReplayTelegramClient(histories, photo_bytes=args.photo_bytes, **options)
+
+
+async def run_configuration(args, concurrency: int, download_workers: int, request_rate: float,
+                            sink: str) -> dict:
+    client = build_client(args)
+    channels = [f"@{name}" for name in client.histories]
+    with tempfile.TemporaryDirectory(prefix="bench_scraper_") as base_path:
+        tracemalloc.start()
+        started = time.perf_counter()
+        stats = await scrape_all_channels(
+            client,
+            channels,
+            base_path,
+            limit=args.limit,
+            channel_delay=0,
+            concurrency=concurrency,
+            request_rate=request_rate,
+            max_request_rate=request_rate,
+            incremental=False,
+            download_workers=download_workers,
+            metrics_file=os.path.join(base_path, "bench.prom"),
+            parquet=(sink == "parquet"),
+        )
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    messages = sum(stats.values())
+    return {
+        "concurrency": concurrency,
+        "download_workers": download_workers,
+        "request_rate": request_rate,
+        "sink": sink,
+        "page_latency": args.page_latency,
+        "media_latency": args.media_latency,
+        "flood_every": args.flood_every,
+        "channels": len(channels),
+        "messages": messages,
+        "seconds": round(elapsed, 3),
+        "messages_per_sec": round(messages / elapsed, 1) if elapsed > 0 else 0.0,
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        "api_requests": client.requests,
+        "flood_waits": client.flood_waits,
+    }
+
+
+def main(argv: List[str] = None) -> List[dict]:
+    parser = argparse.ArgumentParser(description="Benchmark scripts/telegram.py against a replay client")
+    parser.add_argument("--channels", type=int, default=4, help="Synthetic channels (default: 4)")
+    parser.add_argument("--messages", type=int, default=1000, help="Synthetic messages per channel (default: 1000)")
+    parser.add_argument("--limit", type=int, default=None, help="Scrape limit per channel (default: all)")
+    parser.add_argument("--photo-ratio", type=float, default=0.3, help="Share of messages with a photo")
+    parser.add_argument("--repost-ratio", type=float, default=0.5, help="Share of photos that are reposts")
+    parser.add_argument("--photo-bytes", type=int, default=50_000, help="Size of each synthetic photo")
+    parser.add_argument("--replay-path", type=str, default="", help="Replay a scraped datalake instead")
+    parser.add_argument("--replay-date", type=str, default="", help="Date partition to replay (YYYY-MM-DD)")
+    parser.add_argument("--page-latency", type=float, default=0.05, help="Seconds per history page")
+    parser.add_argument("--media-latency", type=float, default=0.05, help="Seconds per photo download")
+    parser.add_argument("--flood-every", type=int, default=0, help="Inject a FloodWaitError every N requests")
+    parser.add_argument("--flood-seconds", type=int, default=1, help="Wait asked for by injected flood errors")
+    parser.add_argument("--concurrency", type=str, default="1,4", help="Comma-separated values to compare")
+    parser.add_argument("--download-workers", type=str, default="1,4", help="Comma-separated values to compare")
+    parser.add_argument("--request-rate", type=str, default="1000", help="Comma-separated values to compare")
+    parser.add_argument("--sinks", type=str, default="ndjson",
+                        help="Comma-separated sinks to compare: ndjson, parquet (NDJSON + Parquet copy)")
+    parser.add_argument("--output", type=str, default="", help="Write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep the scraper's INFO logging")
+    args = parser.parse_args(argv)
+
+    if args.replay_path and not args.replay_date:
+        parser.error("--replay-path needs --replay-date")
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+
+    results = []
+    grid = itertools.product(
+        parse_list(args.concurrency, int),
+        parse_list(args.download_workers, int),
+        parse_list(args.request_rate, float),
+        parse_list(args.sinks, str.strip),
+    )
+    for concurrency, download_workers, request_rate, sink in grid:
+        result = asyncio.run(run_configuration(args, concurrency, download_workers, request_rate, sink))
+        results.append(result)
+        print(
+            f"concurrency={concurrency:<3} download_workers={download_workers:<3} "
+            f"rate={request_rate:<7g} sink={sink:<8} {result['messages']:>7} msgs  {result['seconds']:>8.2f}s  "
+            f"{result['messages_per_sec']:>9.1f} msg/s  peak {result['peak_memory_mb']:.1f} MB"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Report written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Datalake Compaction
+===================
+Merges the closed daily partitions under data/raw/telegram_messages/ into a
+few large NDJSON part files (one channel per part), keeping the newest copy
+of each (channel, message_id), with an index at
+data/raw/telegram_messages/_compacted/_index.json.
+load_raw_to_postgres.py reads the compacted parts instead of the date
+partitions they cover.
+
+Each run writes a new generation from the previous one plus any partitions
+closed since, so it is safe to run on a schedule.
+
+Usage:
+    python scripts/compact_datalake.py
+    python scripts/compact_datalake.py --target-size-mb 256 --prune
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.datalake import DEFAULT_COMPACT_TARGET_BYTES, compact_partitions
+
+
+def main(argv: List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Compact closed Telegram datalake partitions")
+    parser.add_argument("--path", type=str, default="data", help="Base data directory (default: data)")
+    parser.add_argument("--target-size-mb", type=float, default=DEFAULT_COMPACT_TARGET_BYTES / (1024 * 1024),
+                        help="Approximate size of each compacted part file in MB (default: 128)")
+    parser.add_argument("--prune", action="store_true",
+                        help="Delete the message files of compacted date partitions")
+    parser.add_argument("--today", type=str, default=None,
+                        help="Treat partitions before this date (YYYY-MM-DD) as closed (default: today, UTC)")
+    args = parser.parse_args(argv)
+
+    index = compact_partitions(
+        os.path.abspath(args.path),
+        target_bytes=int(args.target_size_mb * 1024 * 1024),
+        prune=args.prune,
+        today=args.today,
+    )
+    print(json.dumps({k: index[k] for k in ("generation", "messages", "duplicates_dropped")}))
+    print(f"Compacted {len(index['dates'])} date partitions into {len(index['parts'])} part files")
+    return index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Synthetic Telegram Datalake Generator
+=====================================
+Writes a fake raw/telegram_messages/YYYY-MM-DD/{channel}.json tree for
+benchmarking and exercising load_raw_to_postgres.py at realistic scale.
+
+Messages mix the field spellings the loader has to handle: the scraper's
+own (message_id / message_date / channel_name), Telethon-style dumps
+(id / date / chat_username / message) and the warehouse column names
+(message_text / view_count / has_image), with the date formats each of
+them uses. A share of every day's messages can repeat earlier days, like a
+rescrape with fresher view counts.
+
+Usage:
+    python scripts/generate_synthetic_datalake.py --path data_synthetic \\
+        --channels 20 --days 30 --messages 2000
+    python scripts/generate_synthetic_datalake.py --format jsonl --shape object
+"""
+
+import os
+import json
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+WORDS = (
+    "paracetamol amoxicillin vitamin syrup tablet capsule cream lotion serum "
+    "price birr delivery available order addis ababa pharmacy original stock"
+).split()
+
+# Field spellings of the sources the loader reads, see _message()
+ALIAS_STYLES = ("scraper", "telethon", "warehouse")
+
+
+def _message(style: str, channel: str, channel_id: int, message_id: int, date: datetime, text: str,
+             views: int, forwards: int, has_photo: bool) -> dict:
+    if style == "telethon":
+        return {
+            "id": message_id,
+            "chat_id": channel_id,
+            "chat_username": channel,
+            "chat_title": channel.replace("_", " ").title(),
+            "date": date.strftime("%Y-%m-%d %H:%M:%S"),
+            "message": text,
+            "photo": has_photo or None,
+            "views": views,
+            "forwards": forwards,
+        }
+    if style == "warehouse":
+        return {
+            "message_id": message_id,
+            "channel_username": channel,
+            "channel_name": channel.replace("_", " ").title(),
+            "message_date": date.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "message_text": text,
+            "has_image": has_photo,
+            "view_count": views,
+            "forward_count": forwards,
+        }
+    return {
+        "message_id": message_id,
+        "channel_name": channel,
+        "channel_title": channel.replace("_", " ").title(),
+        "message_date": date.isoformat(),
+        "message_text": text,
+        "has_media": has_photo,
+        "image_path": f"data/raw/images/{channel}/{message_id}.jpg" if has_photo else None,
+        "views": views,
+        "forwards": forwards,
+    }
+
+
+def generate_datalake(base_path: str, channels: int = 10, days: int = 7, messages: int = 1000,
+                      text_words: int = 30, alias_styles: List[str] = ALIAS_STYLES,
+                      repeat_ratio: float = 0.1, photo_ratio: float = 0.3,
+                      file_format: str = "json", shape: str = "list",
+                      start_date: str = "2024-01-01", seed: int = 0) -> dict:
+    """
+    Write channels x days partition files of `messages` messages each and
+    return a summary (files, messages, bytes). text_words is the mean
+    message length in words. repeat_ratio of each day's messages repeat
+    messages of the previous day with higher view and forward counts.
+    """
+    rng = random.Random(seed)
+    first_day = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    summary = {"files": 0, "messages": 0, "bytes": 0}
+    for c in range(channels):
+        channel = f"synthetic_channel_{c:03d}"
+        next_id = 1
+        previous: List[list] = []
+        for d in range(days):
+            day = first_day + timedelta(days=d)
+            date_str = day.strftime("%Y-%m-%d")
+            # Rescraped messages keep their date and text; counters grow
+            contents = rng.sample(previous, min(len(previous), int(messages * repeat_ratio)))
+            for content in contents:
+                content[3] += rng.randrange(0, 1000)
+                content[4] += rng.randrange(0, 10)
+            while len(contents) < messages:
+                words = max(0, int(rng.expovariate(1 / text_words))) if text_words else 0
+                contents.append([
+                    next_id,
+                    day + timedelta(seconds=rng.randrange(86400)),
+                    " ".join(rng.choice(WORDS) for _ in range(words)),
+                    rng.randrange(100, 50_000),
+                    rng.randrange(0, 500),
+                    rng.random() < photo_ratio,
+                ])
+                next_id += 1
+            previous = contents
+
+            batch = [
+                _message(rng.choice(alias_styles), channel, -1001000000000 - c, message_id, date, text,
+                         views, forwards, has_photo)
+                for message_id, date, text, views, forwards, has_photo in contents
+            ]
+
+            json_dir = os.path.join(base_path, "raw", "telegram_messages", date_str)
+            os.makedirs(json_dir, exist_ok=True)
+            if file_format == "jsonl":
+                file_path = os.path.join(json_dir, f"{channel}.jsonl")
+                with open(file_path, "w", encoding="utf-8") as f:
+                    for m in batch:
+                        f.write(json.dumps(m, ensure_ascii=False, separators=(",", ":")) + "\n")
+            else:
+                file_path = os.path.join(json_dir, f"{channel}.json")
+                with open(file_path, "w", encoding="utf-8") as f:
+                    json.dump({"messages": batch} if shape == "object" else batch, f, ensure_ascii=False)
+            summary["files"] += 1
+            summary["messages"] += len(batch)
+            summary["bytes"] += os.path.getsize(file_path)
+    return summary
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--channels", type=int, default=10, help="Channels (default: 10)")
+    parser.add_argument("--days", type=int, default=7, help="Date partitions (default: 7)")
+    parser.add_argument("--messages", type=int, default=1000, help="Messages per channel per day (default: 1000)")
+    parser.add_argument("--text-words", type=int, default=30, help="Mean message length in words (default: 30)")
+    parser.add_argument("--alias-styles", type=str, default=",".join(ALIAS_STYLES),
+                        help=f"Comma-separated field spellings to mix (default: {','.join(ALIAS_STYLES)})")
+    parser.add_argument("--repeat-ratio", type=float, default=0.1,
+                        help="Share of each day's messages repeated from the day before (default: 0.1)")
+    parser.add_argument("--photo-ratio", type=float, default=0.3, help="Share of messages with a photo")
+    parser.add_argument("--format", dest="file_format", choices=("json", "jsonl"), default="json",
+                        help="Partition file format (default: json)")
+    parser.add_argument("--shape", choices=("list", "object"), default="list",
+                        help='json files: a list of messages or {"messages": [...]} (default: list)')
+    parser.add_argument("--start-date", type=str, default="2024-01-01", help="First partition date")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+
+def generator_options(args) -> dict:
+    return dict(
+        channels=args.channels,
+        days=args.days,
+        messages=args.messages,
+        text_words=args.text_words,
+        alias_styles=[s.strip() for s in args.alias_styles.split(",") if s.strip()],
+        repeat_ratio=args.repeat_ratio,
+        photo_ratio=args.photo_ratio,
+        file_format=args.file_format,
+        shape=args.shape,
+        start_date=args.start_date,
+        seed=args.seed,
+    )
+
+
+def main(argv: List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Telegram datalake")
+    parser.add_argument("--path", type=str, default="data_synthetic",
+                        help="Base data directory to write raw/telegram_messages under (default: data_synthetic)")
+    add_generator_arguments(parser)
+    args = parser.parse_args(argv)
+    options = generator_options(args)
+    unknown = set(options["alias_styles"]) - set(ALIAS_STYLES)
+    if unknown:
+        parser.error(f"unknown alias styles: {', '.join(sorted(unknown))}")
+
+    summary = generate_datalake(args.path, **options)
+    print(f"Wrote {summary['messages']} messages in {summary['files']} files "
+          f"({summary['bytes'] / 1024 / 1024:.1f} MB) under {os.path.join(args.path, 'raw', 'telegram_messages')}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,37 @@
 import os
+import sys
+import re
 import json
 import glob
-from datetime import datetime
-from typing import Iterator, Dict, Any, List
+import hashlib
+import time
+import argparse
+import multiprocessing
+import itertools
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import psycopg2
+import psycopg2.errors
 from psycopg2.extras import execute_values
 
+# Allow running this file directly: `python scripts/load_raw_to_postgres.py`
+# by adding the project root to PYTHONPATH so `import src.*` works.
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.datalake import (
+    COMPACTED_DIR,
+    MalformedPartitionError,
+    catalog_entry_overlaps,
+    iter_parquet_messages,
+    iter_partition_file_messages,
+    read_catalog,
+    read_compaction_index,
+)
+
 
 POSTGRES_DSN = os.getenv(
     "DATABASE_URL",
@@ -17,43 +42,465 @@ DATA_LAKE_BASE = os.path.join(
     os.path.dirname(__file__), "..", "data", "raw", "telegram_messages"
 )
 
+PARQUET_LAKE_BASE = os.path.join(
+    os.path.dirname(__file__), "..", "data", "raw", "telegram_parquet"
+)
+
+# Which copy of the datalake to load: "json" (JSON/NDJSON partitions) or
+# "parquet" (the columnar copy written by `telegram.py --parquet`).
+RAW_FORMAT = os.getenv("RAW_FORMAT", "json")
+
 RAW_SCHEMA = os.getenv("RAW_SCHEMA", "raw")
 RAW_TABLE = "telegram_messages"
 
+# "copy" streams rows with COPY FROM STDIN; "insert" is the execute_values fallback
+LOAD_MODE = os.getenv("LOAD_MODE", "copy")
+COMMIT_EVERY = int(os.getenv("LOAD_COMMIT_EVERY", "100000"))
+COPY_BUFFER_SIZE = 1 << 16
 
-def iter_json_messages(base_dir: str) -> Iterator[Dict[str, Any]]:
+STAGING_TABLE = f"_{RAW_TABLE}_staging"
+NATURAL_KEY_CONSTRAINT = f"{RAW_TABLE}_channel_message_key"
+LEDGER_TABLE = "_load_ledger"
+
+# The partitioned raw table's natural key uses UNIQUE NULLS NOT DISTINCT,
+# which needs PostgreSQL 15 (server_version_num 150000) or later.
+PARTITIONED_MIN_SERVER_VERSION = 150000
+
+# Parallel loading: worker processes (1 loads in this process) and how often
+# a file is retried when concurrent merges deadlock
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "1"))
+DEADLOCK_RETRIES = 3
+
+# Messages coerced together by coerce_batch()
+COERCE_BATCH_SIZE = 5000
+
+
+def _parse_bound(value: str):
+    if not value:
+        return None
+    bound = datetime.fromisoformat(value)
+    return bound if bound.tzinfo else bound.replace(tzinfo=timezone.utc)
+
+
+# Optional bounds for backfills: files whose cataloged message_date /
+# message_id range lies outside them are skipped without being opened.
+# Parquet files are also filtered row group by row group; those bounded
+# loads are not recorded in the ledger (see loads_whole_file).
+LOAD_SINCE = _parse_bound(os.getenv("LOAD_SINCE", ""))
+LOAD_UNTIL = _parse_bound(os.getenv("LOAD_UNTIL", ""))
+LOAD_MIN_MESSAGE_ID = int(os.getenv("LOAD_MIN_MESSAGE_ID", "0")) or None
+
+
+def _skip_cataloged(fp: str, entry: Dict[str, Any]) -> bool:
+    # Only trust catalog stats for files that are unchanged since they were cataloged
+    if not entry:
+        return False
+    stat = os.stat(fp)
+    if stat.st_size != entry.get("bytes") or stat.st_mtime != entry.get("mtime"):
+        return False
+    return not catalog_entry_overlaps(entry, LOAD_MIN_MESSAGE_ID, LOAD_SINCE, LOAD_UNTIL)
+
+
+def iter_json_files(base_dir: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
     # Expect structure: data/raw/telegram_messages/YYYY-MM-DD/*.json
+    # or streamed NDJSON: data/raw/telegram_messages/YYYY-MM-DD/*.jsonl
+    # Dates covered by a compacted generation (see scripts/compact_datalake.py)
+    # are read from data/raw/telegram_messages/_compacted/ instead.
+    # Yields (path, catalog entry or None) for every file to read.
     base_dir = os.path.abspath(base_dir)
+    # The datalake helpers take the datalake root (the dir holding raw/)
+    lake_root = os.path.dirname(os.path.dirname(base_dir))
+    compaction = read_compaction_index(lake_root)
+    compacted_dates = set(compaction.get("dates", []))
+    catalog = read_catalog(lake_root).get("dates", {})
+    for part in compaction.get("parts", []):
+        if catalog_entry_overlaps(part, LOAD_MIN_MESSAGE_ID, LOAD_SINCE, LOAD_UNTIL):
+            yield os.path.join(base_dir, COMPACTED_DIR, part["path"]), part
     for date_dir in sorted(glob.glob(os.path.join(base_dir, "*"))):
-        if not os.path.isdir(date_dir):
+        date_str = os.path.basename(date_dir)
+        if not os.path.isdir(date_dir) or date_str.startswith("_") or date_str in compacted_dates:
             continue
-        for fp in glob.glob(os.path.join(date_dir, "*.json")):
-            with open(fp, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    continue
-                if isinstance(data, list):
-                    for m in data:
-                        if isinstance(m, dict):
-                            yield m
-                elif isinstance(data, dict):
-                    # Could be NDJSON-like or dict with 'messages'
-                    messages = data.get("messages") if isinstance(data, dict) else None
-                    if isinstance(messages, list):
-                        for m in messages:
-                            if isinstance(m, dict):
-                                yield m
+        cataloged_files = catalog.get(date_str, {}).get("files", {})
+        for fp in glob.glob(os.path.join(date_dir, "*.jsonl")) + glob.glob(os.path.join(date_dir, "*.json")):
+            name = os.path.basename(fp)
+            entry = cataloged_files.get(f"{date_str}/{name}")
+            if name.startswith("_") or _skip_cataloged(fp, entry):
+                continue
+            yield fp, entry
+
+
+def iter_parquet_files(base_dir: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    # Expect structure: data/raw/telegram_parquet/date=YYYY-MM-DD/channel=NAME/*.parquet
+    base_dir = os.path.abspath(base_dir)
+    for fp in sorted(glob.glob(os.path.join(base_dir, "date=*", "channel=*", "*.parquet"))):
+        yield fp, None
+
+
+def loads_whole_file(fp: str) -> bool:
+    # Parquet files are filtered row group by row group to the LOAD_* bounds;
+    # such a partial load must not be recorded in the ledger, or the next
+    # unbounded run would skip the rest of the file.
+    return not fp.endswith(".parquet") or (LOAD_SINCE, LOAD_UNTIL, LOAD_MIN_MESSAGE_ID) == (None, None, None)
+
+
+def iter_file_messages(fp: str) -> Iterator[Dict[str, Any]]:
+    if fp.endswith(".parquet"):
+        return iter_parquet_messages(fp, min_message_id=LOAD_MIN_MESSAGE_ID, since=LOAD_SINCE, until=LOAD_UNTIL)
+    return iter_partition_file_messages(fp)
+
+
+def iter_json_messages(base_dir: str) -> Iterator[Dict[str, Any]]:
+    for fp, _ in iter_json_files(base_dir):
+        yield from iter_file_messages(fp)
+
+
+def iter_parquet_lake_messages(base_dir: str) -> Iterator[Dict[str, Any]]:
+    for fp, _ in iter_parquet_files(base_dir):
+        yield from iter_file_messages(fp)
+
+
+RAW_TABLE_COLUMNS_DDL = """
+    message_id BIGINT,
+    channel_id BIGINT,
+    channel_username TEXT,
+    channel_name TEXT,
+    message_text TEXT,
+    message_date TIMESTAMP WITH TIME ZONE,
+    view_count BIGINT,
+    forward_count BIGINT,
+    has_image BOOLEAN,
+    raw_payload JSONB,
+    load_ts TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+"""
+
+
+def _table_kind(cur, table: str) -> Optional[str]:
+    # pg_class.relkind: 'p' partitioned table, 'r' plain table, None if missing
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (f"{RAW_SCHEMA}.{table}",))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _create_partitioned_raw_table(cur, table: str):
+    # Monthly RANGE partitions on message_date (see ensure_partitions());
+    # rows without a date go to the default partition. A unique key on a
+    # partitioned table must contain the partition key, so message_date is
+    # part of the natural key, with NULLS NOT DISTINCT (PostgreSQL 15+) so
+    # undated messages still conflict.
+    server_version = cur.connection.server_version
+    if server_version < PARTITIONED_MIN_SERVER_VERSION:
+        raise RuntimeError(
+            f"{RAW_SCHEMA}.{table} needs PostgreSQL 15 or later (UNIQUE NULLS NOT DISTINCT); "
+            f"the server is version {server_version // 10000}.{server_version % 10000}"
+        )
+    cur.execute(
+        f"""
+        CREATE TABLE {RAW_SCHEMA}.{table} (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            {RAW_TABLE_COLUMNS_DDL},
+            channel_key TEXT GENERATED ALWAYS AS (COALESCE(channel_username, channel_name, '')) STORED,
+            CONSTRAINT {NATURAL_KEY_CONSTRAINT}
+                UNIQUE NULLS NOT DISTINCT (channel_key, message_id, message_date)
+        ) PARTITION BY RANGE (message_date)
+        """
+    )
+    cur.execute(f"CREATE TABLE {RAW_SCHEMA}.{table}_default PARTITION OF {RAW_SCHEMA}.{table} DEFAULT")
+    # Indexes on the parent are created on every partition, present and future
+    cur.execute(f"CREATE INDEX ON {RAW_SCHEMA}.{table} (message_date)")
+    cur.execute(f"CREATE INDEX ON {RAW_SCHEMA}.{table} (channel_key, message_date)")
+    cur.execute(f"CREATE INDEX ON {RAW_SCHEMA}.{table} (message_id)")
 
 
 def ensure_raw_table(conn):
     with conn.cursor() as cur:
         cur.execute(f"CREATE SCHEMA IF NOT EXISTS {RAW_SCHEMA}")
-        # Create a wide raw table with common Telegram fields; use JSONB for payload
+        kind = _table_kind(cur, RAW_TABLE)
+        if kind is None:
+            # Create a wide raw table with common Telegram fields; use JSONB for payload
+            _create_partitioned_raw_table(cur, RAW_TABLE)
+            conn.commit()
+            return
+        if kind == "p":
+            conn.commit()
+            return
+
+        # A table created before partitioning: keep loading into it and
+        # bring it up to the (channel_key, message_id) natural key. Only
+        # migrate when the key is missing, so regular runs take no
+        # exclusive lock on the table. --partition-table converts it.
+        print(f"{RAW_SCHEMA}.{RAW_TABLE} is not partitioned; run with --partition-table to convert it")
+        cur.execute(
+            "SELECT 1 FROM pg_constraint WHERE conname = %s AND conrelid = %s::regclass",
+            (NATURAL_KEY_CONSTRAINT, f"{RAW_SCHEMA}.{RAW_TABLE}"),
+        )
+        if cur.fetchone() is None:
+            cur.execute(
+                f"""
+                ALTER TABLE {RAW_SCHEMA}.{RAW_TABLE}
+                ADD COLUMN IF NOT EXISTS channel_key TEXT
+                GENERATED ALWAYS AS (COALESCE(channel_username, channel_name, '')) STORED
+                """
+            )
+            # Tables loaded before the key existed hold one row per run;
+            # keep the most recently loaded copy of each message.
+            cur.execute(
+                f"""
+                DELETE FROM {RAW_SCHEMA}.{RAW_TABLE} a
+                USING {RAW_SCHEMA}.{RAW_TABLE} b
+                WHERE a.channel_key = b.channel_key
+                  AND a.message_id = b.message_id
+                  AND a.id < b.id
+                """
+            )
+            if cur.rowcount:
+                print(f"Removed {cur.rowcount} duplicate rows before adding the natural key")
+            cur.execute(
+                f"""
+                ALTER TABLE {RAW_SCHEMA}.{RAW_TABLE}
+                ADD CONSTRAINT {NATURAL_KEY_CONSTRAINT} UNIQUE (channel_key, message_id)
+                """
+            )
+    conn.commit()
+
+
+def migrate_to_partitioned(conn) -> int:
+    # Convert a plain raw table into the partitioned layout in one
+    # transaction: copy every row (ids and load_ts included) into a new
+    # partitioned table, then drop the old one. Rows the new key treats as
+    # duplicates (undated or id-less repeats) are dropped. Returns the rows moved.
+    global _natural_key_columns
+    legacy = f"{RAW_TABLE}_unpartitioned"
+    cols = "id," + ",".join(RAW_COLUMNS) + ",load_ts"
+    with conn.cursor() as cur:
+        if _table_kind(cur, RAW_TABLE) != "r":
+            conn.commit()
+            return 0
+        cur.execute(f"ALTER TABLE {RAW_SCHEMA}.{RAW_TABLE} RENAME TO {legacy}")
+        cur.execute(
+            f"ALTER TABLE {RAW_SCHEMA}.{legacy} RENAME CONSTRAINT {NATURAL_KEY_CONSTRAINT} "
+            f"TO {NATURAL_KEY_CONSTRAINT}_unpartitioned"
+        )
+        cur.execute(
+            f"ALTER TABLE {RAW_SCHEMA}.{legacy} RENAME CONSTRAINT {RAW_TABLE}_pkey TO {legacy}_pkey"
+        )
+        _create_partitioned_raw_table(cur, RAW_TABLE)
+        cur.execute(
+            f"""
+            SELECT DISTINCT to_char(message_date AT TIME ZONE 'UTC', 'YYYY-MM')
+            FROM {RAW_SCHEMA}.{legacy} WHERE message_date IS NOT NULL
+            """
+        )
+        _create_partitions(cur, [month for (month,) in cur.fetchall()])
+        cur.execute(
+            f"INSERT INTO {RAW_SCHEMA}.{RAW_TABLE} ({cols}) SELECT {cols} FROM {RAW_SCHEMA}.{legacy} "
+            "ORDER BY id ON CONFLICT DO NOTHING"
+        )
+        moved = cur.rowcount
+        cur.execute(
+            f"""
+            SELECT setval(pg_get_serial_sequence('{RAW_SCHEMA}.{RAW_TABLE}', 'id'),
+                          GREATEST(COALESCE(MAX(id), 0), 1))
+            FROM {RAW_SCHEMA}.{RAW_TABLE}
+            """
+        )
+        cur.execute(f"DROP TABLE {RAW_SCHEMA}.{legacy}")
+    conn.commit()
+    _known_partitions.clear()
+    _natural_key_columns = None
+    return moved
+
+
+# Monthly partitions this process has seen or created (YYYY-MM)
+_known_partitions = set()
+
+
+def partition_name(month: str) -> str:
+    return f"{RAW_TABLE}_p{month.replace('-', '_')}"
+
+
+def _month_bounds(month: str) -> Tuple[str, str]:
+    year, mon = (int(part) for part in month.split("-"))
+    next_year, next_mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return f"{year:04d}-{mon:02d}-01 00:00:00+00", f"{next_year:04d}-{next_mon:02d}-01 00:00:00+00"
+
+
+def _create_partitions(cur, months: List[str]):
+    for month in sorted(months):
+        low, high = _month_bounds(month)
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {RAW_SCHEMA}.{partition_name(month)}
+            PARTITION OF {RAW_SCHEMA}.{RAW_TABLE} FOR VALUES FROM (%s) TO (%s)
+            """,
+            (low, high),
+        )
+
+
+def list_partitions(conn) -> List[str]:
+    # Attached monthly partitions of the raw table, as YYYY-MM
+    prefix = partition_name("")
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            (f"{RAW_SCHEMA}.{RAW_TABLE}",),
+        )
+        names = [name for (name,) in cur.fetchall()]
+    conn.commit()
+    return sorted(name[len(prefix):].replace("_", "-") for name in names if name.startswith(prefix))
+
+
+def ensure_partitions(conn, months: List[str]):
+    # Create the monthly partitions rows are about to be merged into, in a
+    # short transaction of their own. An advisory lock serialises parallel
+    # loaders meeting the same new month.
+    missing = set(months) - _known_partitions
+    if not missing:
+        return
+    _known_partitions.update(list_partitions(conn))
+    missing -= _known_partitions
+    if not missing:
+        return
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"{RAW_SCHEMA}.{RAW_TABLE} partitions",))
+        _create_partitions(cur, list(missing))
+    conn.commit()
+    _known_partitions.update(list_partitions(conn))
+    unattached = missing - _known_partitions
+    if unattached:
+        # CREATE TABLE IF NOT EXISTS kept a plain table of the same name
+        names = ", ".join(partition_name(month) for month in sorted(unattached))
+        raise RuntimeError(f"{names} exist but are not partitions of {RAW_SCHEMA}.{RAW_TABLE}; "
+                           "rename or reattach them before loading these months")
+
+
+def detach_partitions_before(conn, month: str) -> List[str]:
+    # Detach monthly partitions older than month (YYYY-MM). They stay
+    # behind as plain tables named *_detached that can be archived or
+    # dropped; a later load of those months creates fresh partitions.
+    detached = []
+    for existing in list_partitions(conn):
+        if existing >= month:
+            continue
+        name = partition_name(existing)
+        with conn.cursor() as cur:
+            cur.execute(f"ALTER TABLE {RAW_SCHEMA}.{RAW_TABLE} DETACH PARTITION {RAW_SCHEMA}.{name}")
+            cur.execute(f"ALTER TABLE {RAW_SCHEMA}.{name} RENAME TO {name}_detached")
+        conn.commit()
+        _known_partitions.discard(existing)
+        detached.append(f"{name}_detached")
+    return detached
+
+
+_natural_key_columns: Optional[str] = None
+
+
+def natural_key_columns(conn) -> str:
+    # Conflict target of the raw table's natural key; message_date is part
+    # of it once the table is partitioned
+    global _natural_key_columns
+    if _natural_key_columns is None:
+        with conn.cursor() as cur:
+            partitioned = _table_kind(cur, RAW_TABLE) == "p"
+        conn.commit()
+        _natural_key_columns = "channel_key, message_id" + (", message_date" if partitioned else "")
+    return _natural_key_columns
+
+
+def is_partitioned(conn) -> bool:
+    return natural_key_columns(conn).endswith("message_date")
+
+
+def ensure_ledger_table(conn):
+    # One row per ingested datalake file; unchanged files are skipped
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {RAW_SCHEMA}.{LEDGER_TABLE} (
+                file_path TEXT PRIMARY KEY,
+                file_size BIGINT NOT NULL,
+                file_mtime DOUBLE PRECISION NOT NULL,
+                checksum TEXT NOT NULL,
+                row_count BIGINT NOT NULL,
+                duration_seconds DOUBLE PRECISION NOT NULL,
+                loaded_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            )
+            """
+        )
+    conn.commit()
+
+
+def read_ledger(conn) -> Dict[str, Tuple[int, float, str]]:
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT file_path, file_size, file_mtime, checksum FROM {RAW_SCHEMA}.{LEDGER_TABLE}")
+        ledger = {path: (size, mtime, checksum) for path, size, mtime, checksum in cur.fetchall()}
+    conn.commit()
+    return ledger
+
+
+def record_ledger(conn, path: str, size: int, mtime: float, checksum: str,
+                  row_count: Optional[int] = None, duration: Optional[float] = None):
+    # Without row_count / duration only the file's size and mtime are
+    # refreshed (a touched file whose content did not change).
+    with conn.cursor() as cur:
+        if row_count is None:
+            cur.execute(
+                f"UPDATE {RAW_SCHEMA}.{LEDGER_TABLE} SET file_size = %s, file_mtime = %s WHERE file_path = %s",
+                (size, mtime, path),
+            )
+        else:
+            cur.execute(
+                f"""
+                INSERT INTO {RAW_SCHEMA}.{LEDGER_TABLE}
+                    (file_path, file_size, file_mtime, checksum, row_count, duration_seconds)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (file_path) DO UPDATE SET
+                    file_size = EXCLUDED.file_size,
+                    file_mtime = EXCLUDED.file_mtime,
+                    checksum = EXCLUDED.checksum,
+                    row_count = EXCLUDED.row_count,
+                    duration_seconds = EXCLUDED.duration_seconds,
+                    loaded_at = NOW()
+                """,
+                (path, size, mtime, checksum, row_count, duration),
+            )
+    conn.commit()
+
+
+def sources_loaded(entry: Optional[Dict[str, Any]], ledger: Dict[str, Tuple[int, float, str]]) -> bool:
+    # A compacted part lists the files its messages came from ({path: sha256},
+    # see compact_partitions); if the ledger holds every one of them with the
+    # same content, the part holds nothing new. Each compaction writes its
+    # parts under a new gen-NNNNNN path, so without this every compaction
+    # would reload the full history. Sources are one generation deep: when
+    # dates were pruned and compacted twice without a load in between, the
+    # new parts are loaded once more (harmless, loads upsert).
+    sources = (entry or {}).get("sources")
+    return bool(sources) and all(
+        path in ledger and ledger[path][2] == checksum for path, checksum in sources.items()
+    )
+
+
+def file_checksum(fp: str, size: int, mtime: float, entry: Optional[Dict[str, Any]] = None) -> str:
+    # Reuse the sha256 from the datalake catalog when it describes this
+    # exact file (compacted parts are immutable and carry no mtime).
+    if entry and entry.get("sha256") and entry.get("bytes") == size and entry.get("mtime", mtime) == mtime:
+        return entry["sha256"]
+    digest = hashlib.sha256()
+    with open(fp, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ensure_staging_table(conn, staging_table: str = STAGING_TABLE):
+    # Unlogged landing table for COPY; rows are merged into the raw table
+    # and truncated after every commit. Parallel workers each get their own.
+    with conn.cursor() as cur:
         cur.execute(
             f"""
-            CREATE TABLE IF NOT EXISTS {RAW_SCHEMA}.{RAW_TABLE} (
-                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            CREATE UNLOGGED TABLE IF NOT EXISTS {RAW_SCHEMA}.{staging_table} (
+                seq BIGINT GENERATED ALWAYS AS IDENTITY,
                 message_id BIGINT,
                 channel_id BIGINT,
                 channel_username TEXT,
@@ -63,14 +510,48 @@ def ensure_raw_table(conn):
                 view_count BIGINT,
                 forward_count BIGINT,
                 has_image BOOLEAN,
-                raw_payload JSONB,
-                load_ts TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                raw_payload JSONB
             )
             """
         )
+        cur.execute(f"TRUNCATE {RAW_SCHEMA}.{staging_table}")
     conn.commit()
 
 
+# Source keys for each raw column, in order of preference
+FIELD_ALIASES = {
+    "message_id": ("id", "message_id"),
+    "channel_id": ("chat_id", "channel_id"),
+    "channel_username": ("chat_username", "channel_username", "channel"),
+    "channel_name": ("chat_title", "channel_name"),
+    "message_text": ("message", "text", "message_text"),
+    "message_date": ("date", "message_date"),
+    "view_count": ("views", "view_count"),
+    "forward_count": ("forwards", "forward_count"),
+    "has_image": ("has_image", "has_media", "photo"),
+}
+
+DATE_FORMATS = ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%d %H:%M:%S%z", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+
+# Timestamps that all of DATE_FORMATS and datetime.fromisoformat() read the
+# same way; anything else goes through strptime.
+_ISO_TIMESTAMP = re.compile(
+    r"\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])[T ]"
+    r"(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d(?:[+-]\d\d:?[0-5]\d|Z)?"
+)
+
+_payload_encoder = json.JSONEncoder(ensure_ascii=False)
+
+
+def parse_message_date(dt_raw: str) -> Optional[datetime]:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(dt_raw, fmt)
+        except Exception:
+            continue
+    return None
+
+
 def coerce_record(m: Dict[str, Any]) -> Dict[str, Any]:
     def get_first(*keys, default=None):
         for k in keys:
@@ -79,70 +560,557 @@ def coerce_record(m: Dict[str, Any]) -> Dict[str, Any]:
         return default
 
     # Parse date
-    dt_raw = get_first("date", "message_date")
+    dt_raw = get_first(*FIELD_ALIASES["message_date"])
     dt = None
     if isinstance(dt_raw, str):
-        for fmt in ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%d %H:%M:%S%z", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
-            try:
-                dt = datetime.strptime(dt_raw, fmt)
-                break
-            except Exception:
-                continue
+        dt = parse_message_date(dt_raw)
 
-    has_image = bool(get_first("has_image", "has_media", "photo", default=False))
+    has_image = bool(get_first(*FIELD_ALIASES["has_image"], default=False))
 
     return {
-        "message_id": get_first("id", "message_id"),
-        "channel_id": get_first("chat_id", "channel_id"),
-        "channel_username": get_first("chat_username", "channel_username", "channel"),
-        "channel_name": get_first("chat_title", "channel_name"),
-        "message_text": get_first("message", "text", "message_text"),
+        "message_id": get_first(*FIELD_ALIASES["message_id"]),
+        "channel_id": get_first(*FIELD_ALIASES["channel_id"]),
+        "channel_username": get_first(*FIELD_ALIASES["channel_username"]),
+        "channel_name": get_first(*FIELD_ALIASES["channel_name"]),
+        "message_text": get_first(*FIELD_ALIASES["message_text"]),
         "message_date": dt,
-        "view_count": get_first("views", "view_count"),
-        "forward_count": get_first("forwards", "forward_count"),
+        "view_count": get_first(*FIELD_ALIASES["view_count"]),
+        "forward_count": get_first(*FIELD_ALIASES["forward_count"]),
         "has_image": has_image,
         "raw_payload": json.dumps(m, ensure_ascii=False),
     }
 
 
+_UNPARSED = object()
+
+
+def coerce_batch(messages: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    # Column-wise equivalent of coerce_record() for a batch of messages.
+    # Which aliases can supply each column is worked out once per distinct
+    # key layout in the batch, not per message, and each distinct timestamp
+    # string is parsed once, with datetime.fromisoformat() for the common
+    # ISO forms. Returns {column: values} in RAW_COLUMNS order.
+    fields = [c for c in RAW_COLUMNS if c in FIELD_ALIASES]
+    columns: Dict[str, List[Any]] = {c: [] for c in RAW_COLUMNS}
+    appends = [columns[c].append for c in fields]
+    date_index = fields.index("message_date")
+    image_index = fields.index("has_image")
+    plans: Dict[tuple, tuple] = {}
+    dates: Dict[str, Optional[datetime]] = {}
+
+    for m in messages:
+        layout = tuple(m)
+        plan = plans.get(layout)
+        if plan is None:
+            plan = plans[layout] = tuple(tuple(k for k in FIELD_ALIASES[c] if k in m) for c in fields)
+        for i, keys in enumerate(plan):
+            value = None
+            for k in keys:
+                value = m[k]
+                if value is not None:
+                    break
+            if i == date_index:
+                if isinstance(value, str):
+                    dt_raw = value
+                    value = dates.get(dt_raw, _UNPARSED)
+                    if value is _UNPARSED:
+                        value = dates[dt_raw] = _parse_date_fast(dt_raw)
+                else:
+                    value = None
+            elif i == image_index:
+                value = bool(value)
+            appends[i](value)
+        columns["raw_payload"].append(_payload_encoder.encode(m))
+    return columns
+
+
+def _parse_date_fast(dt_raw: str) -> Optional[datetime]:
+    if _ISO_TIMESTAMP.fullmatch(dt_raw):
+        try:
+            return datetime.fromisoformat(dt_raw)
+        except ValueError:
+            pass
+    return parse_message_date(dt_raw)
+
+
+def iter_coerced_rows(messages: Iterator[Dict[str, Any]], batch_size: int = COERCE_BATCH_SIZE) -> Iterator[tuple]:
+    # Coerce messages batch by batch and yield rows in RAW_COLUMNS order
+    messages = iter(messages)
+    while True:
+        batch = list(itertools.islice(messages, batch_size))
+        if not batch:
+            return
+        columns = coerce_batch(batch)
+        yield from zip(*(columns[c] for c in RAW_COLUMNS))
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    if isinstance(a, datetime) and isinstance(b, datetime):
+        return a.replace(tzinfo=None) == b.replace(tzinfo=None) and a.utcoffset() == b.utcoffset()
+    return type(a) is type(b) and a == b
+
+
+def verify_coercion(messages: Iterator[Dict[str, Any]], batch_size: int = COERCE_BATCH_SIZE) -> Tuple[int, List[str]]:
+    # Check coerce_batch() against coerce_record() message by message.
+    # Returns (messages checked, descriptions of mismatching fields).
+    messages = iter(messages)
+    checked = 0
+    mismatches: List[str] = []
+    while True:
+        batch = list(itertools.islice(messages, batch_size))
+        if not batch:
+            return checked, mismatches
+        columns = coerce_batch(batch)
+        for i, m in enumerate(batch):
+            expected = coerce_record(m)
+            for c in RAW_COLUMNS:
+                if not _same_value(expected[c], columns[c][i]):
+                    mismatches.append(f"{c}: record={expected[c]!r} batch={columns[c][i]!r} in {m!r}")
+        checked += len(batch)
+
+
+RAW_COLUMNS = [
+    "message_id",
+    "channel_id",
+    "channel_username",
+    "channel_name",
+    "message_text",
+    "message_date",
+    "view_count",
+    "forward_count",
+    "has_image",
+    "raw_payload",
+]
+
+
+# Refresh the mutable fields of a message that is already loaded; rows
+# that did not change are left alone so reruns do not churn the table.
+UPSERT_CLAUSE = """
+    ON CONFLICT ({key}) DO UPDATE SET
+        message_text = EXCLUDED.message_text,
+        view_count = COALESCE(EXCLUDED.view_count, {table}.view_count),
+        forward_count = COALESCE(EXCLUDED.forward_count, {table}.forward_count),
+        has_image = EXCLUDED.has_image,
+        raw_payload = EXCLUDED.raw_payload,
+        load_ts = NOW()
+    WHERE ({table}.message_text, {table}.view_count, {table}.forward_count,
+           {table}.has_image, {table}.raw_payload)
+          IS DISTINCT FROM
+          (EXCLUDED.message_text, COALESCE(EXCLUDED.view_count, {table}.view_count),
+           COALESCE(EXCLUDED.forward_count, {table}.forward_count),
+           EXCLUDED.has_image, EXCLUDED.raw_payload)
+"""
+
+
+def _natural_key(r: Dict[str, Any], partitioned: bool = False):
+    # Mirrors channel_key = COALESCE(channel_username, channel_name, ''): an
+    # empty username is a value, not a missing one
+    channel_key = r.get("channel_username")
+    if channel_key is None:
+        channel_key = r.get("channel_name")
+    if channel_key is None:
+        channel_key = ""
+    key = (channel_key, r.get("message_id"))
+    return key + (r.get("message_date"),) if partitioned else key
+
+
 def batch_insert(conn, rows: List[Dict[str, Any]]):
     if not rows:
         return
-    cols = [
-        "message_id",
-        "channel_id",
-        "channel_username",
-        "channel_name",
-        "message_text",
-        "message_date",
-        "view_count",
-        "forward_count",
-        "has_image",
-        "raw_payload",
-    ]
-    values = [[r.get(c) for c in cols] for r in rows]
+    cols = RAW_COLUMNS
+    # One row per natural key (the last one wins), as ON CONFLICT cannot
+    # touch the same row twice in one statement
+    partitioned = is_partitioned(conn)
+    unique_rows = {_natural_key(r, partitioned): r for r in rows if r.get("message_id") is not None}
+    values = [[r.get(c) for c in cols] for r in unique_rows.values()]
+    if partitioned:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT DISTINCT to_char(d AT TIME ZONE 'UTC', 'YYYY-MM') "
+                "FROM unnest(%s::timestamptz[]) d WHERE d IS NOT NULL",
+                ([r["message_date"] for r in unique_rows.values()],),
+            )
+            months = [month for (month,) in cur.fetchall()]
+        conn.commit()
+        ensure_partitions(conn, months)
     with conn.cursor() as cur:
         execute_values(
             cur,
-            f"INSERT INTO {RAW_SCHEMA}.{RAW_TABLE} (" + ",".join(cols) + ") VALUES %s",
+            f"INSERT INTO {RAW_SCHEMA}.{RAW_TABLE} (" + ",".join(cols) + ") VALUES %s"
+            + UPSERT_CLAUSE.format(table=RAW_TABLE, key=natural_key_columns(conn)),
             values,
         )
     conn.commit()
 
 
-def main():
+def staged_months(cur, staging_table: str = STAGING_TABLE) -> List[str]:
+    cur.execute(
+        f"""
+        SELECT DISTINCT to_char(message_date AT TIME ZONE 'UTC', 'YYYY-MM')
+        FROM {RAW_SCHEMA}.{staging_table} WHERE message_date IS NOT NULL
+        """
+    )
+    return [month for (month,) in cur.fetchall()]
+
+
+def merge_staging(cur, staging_table: str = STAGING_TABLE, key: str = "channel_key, message_id") -> int:
+    # Upsert the staged rows into the raw table, keeping the last staged
+    # copy of each message. Returns the rows inserted or changed (xmax,
+    # which would tell the two apart, is not available on partitioned tables).
+    cols = ",".join(RAW_COLUMNS)
+    cur.execute(
+        f"""
+        WITH upserted AS (
+            INSERT INTO {RAW_SCHEMA}.{RAW_TABLE} ({cols})
+            SELECT {cols} FROM (
+                SELECT DISTINCT ON (COALESCE(channel_username, channel_name, ''), message_id) {cols}
+                FROM {RAW_SCHEMA}.{staging_table}
+                WHERE message_id IS NOT NULL
+                ORDER BY COALESCE(channel_username, channel_name, ''), message_id, seq DESC
+            ) latest
+            {UPSERT_CLAUSE.format(table=RAW_TABLE, key=key)}
+            RETURNING 1
+        )
+        SELECT COUNT(*) FROM upserted
+        """
+    )
+    (written,) = cur.fetchone()
+    cur.execute(f"TRUNCATE {RAW_SCHEMA}.{staging_table}")
+    return written
+
+
+def _csv_field(value: Any) -> str:
+    # COPY ... (FORMAT csv): an unquoted empty field is NULL, everything else is quoted
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif not isinstance(value, str):
+        value = str(value)
+    return '"' + value.replace('"', '""') + '"'
+
+
+class RecordCopyStream:
+    """
+    Read-only file object that renders coerced rows (in RAW_COLUMNS order)
+    as CSV lines for COPY FROM STDIN on demand, so no batch of rows is ever
+    held in memory.
+    """
+
+    def __init__(self, rows: Iterator[tuple]):
+        self._rows = rows
+        self._pending = b""
+        self.rows = 0
+        # psycopg2 reports errors raised in read() as a failed COPY; keep
+        # the original so the caller can re-raise it
+        self.error: Optional[BaseException] = None
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = [self._pending]
+        buffered = len(self._pending)
+        while size < 0 or buffered < size:
+            try:
+                row = next(self._rows, None)
+            except Exception as e:
+                self.error = e
+                raise
+            if row is None:
+                break
+            line = (",".join(map(_csv_field, row)) + "\n").encode("utf-8")
+            chunks.append(line)
+            buffered += len(line)
+            self.rows += 1
+        data = b"".join(chunks)
+        if size < 0:
+            self._pending = b""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+def copy_records(conn, rows: Iterator[tuple], commit_every: int = 0,
+                 staging_table: str = STAGING_TABLE) -> int:
+    # Stream coerced rows (RAW_COLUMNS order) with COPY into the staging
+    # table and merge them into the raw table, committing every
+    # commit_every rows (0: one transaction). Returns the number of rows.
+    sql = (
+        f"COPY {RAW_SCHEMA}.{staging_table} (" + ",".join(RAW_COLUMNS) + ") "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    ensure_staging_table(conn, staging_table)
+    key = natural_key_columns(conn)
+    rows = iter(rows)
+    total = 0
+    while True:
+        chunk = itertools.islice(rows, commit_every) if commit_every else rows
+        stream = RecordCopyStream(chunk)
+        with conn.cursor() as cur:
+            try:
+                cur.copy_expert(sql, stream, size=COPY_BUFFER_SIZE)
+            except psycopg2.Error:
+                if stream.error is not None:
+                    raise stream.error from None
+                raise
+            months = staged_months(cur, staging_table) if is_partitioned(conn) else []
+        if set(months) - _known_partitions:
+            # Keep the staged rows while the missing partitions are created
+            conn.commit()
+            ensure_partitions(conn, months)
+        with conn.cursor() as cur:
+            written = merge_staging(cur, staging_table, key)
+        conn.commit()
+        total += stream.rows
+        if stream.rows:
+            print(f"Merged {stream.rows} rows: {written} new or changed")
+        if not commit_every or stream.rows < commit_every:
+            return total
+
+
+def insert_records(conn, records: Iterator[Dict[str, Any]], batch_size: int = 1000) -> int:
+    # Fallback path: execute_values in batches, one commit per batch.
+    buffer: List[Dict[str, Any]] = []
+    total = 0
+    for record in records:
+        buffer.append(record)
+        if len(buffer) >= batch_size:
+            batch_insert(conn, buffer)
+            total += len(buffer)
+            buffer.clear()
+    if buffer:
+        batch_insert(conn, buffer)
+        total += len(buffer)
+    return total
+
+
+def load_file(conn, fp: str, mode: str, commit_every: int, batch_size: int, coerce: str = "batch",
+              staging_table: str = STAGING_TABLE) -> int:
+    messages = iter_file_messages(fp)
+    if mode == "copy":
+        if coerce == "batch":
+            rows = iter_coerced_rows(messages)
+        else:
+            rows = (tuple(r[c] for c in RAW_COLUMNS) for r in map(coerce_record, messages))
+        return copy_records(conn, rows, commit_every=commit_every, staging_table=staging_table)
+    return insert_records(conn, (coerce_record(m) for m in messages), batch_size=batch_size)
+
+
+def load_file_task(conn, task: Dict[str, Any], mode: str, commit_every: int, batch_size: int,
+                   coerce: str = "batch", staging_table: str = STAGING_TABLE) -> Dict[str, Any]:
+    # Load one file and record it in the ledger. Failures are returned, not
+    # raised, so one bad file does not stop the run; deadlocks between
+    # parallel workers are retried, which is safe because loads upsert.
+    result = {"path": task["path"], "status": "loaded", "rows": 0, "duration": 0.0, "error": None}
+    try:
+        checksum = file_checksum(task["fp"], task["size"], task["mtime"], task["entry"])
+        if task["checksum"] == checksum:
+            if task["whole"]:
+                record_ledger(conn, task["path"], task["size"], task["mtime"], checksum)
+            result["status"] = "unchanged"
+            return result
+        for attempt in range(1, DEADLOCK_RETRIES + 1):
+            started = time.perf_counter()
+            try:
+                rows = load_file(conn, task["fp"], mode, commit_every, batch_size, coerce, staging_table)
+            except (psycopg2.errors.DeadlockDetected, psycopg2.errors.SerializationFailure):
+                conn.rollback()
+                if attempt == DEADLOCK_RETRIES:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+                continue
+            result["duration"] = time.perf_counter() - started
+            result["rows"] = rows
+            if task["whole"]:
+                record_ledger(conn, task["path"], task["size"], task["mtime"], checksum, rows, result["duration"])
+            return result
+    except Exception as e:
+        if not conn.closed:
+            conn.rollback()
+        # Commits made before reaching the damage in a malformed file stay;
+        # it is not recorded in the ledger, so it is retried until fixed.
+        result["status"] = "malformed" if isinstance(e, MalformedPartitionError) else "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def load_file_group(conn, tasks: List[Dict[str, Any]], options: Dict[str, Any],
+                    staging_table: str = STAGING_TABLE) -> List[Dict[str, Any]]:
+    # Files of one group are loaded in order; after a failure the rest are
+    # left for the next run, so an older file never lands after a newer one.
+    results = []
+    for i, task in enumerate(tasks):
+        result = load_file_task(conn, task, staging_table=staging_table, **options)
+        results.append(result)
+        if result["status"] in ("failed", "malformed"):
+            for rest in tasks[i + 1:]:
+                results.append({"path": rest["path"], "status": "deferred", "rows": 0, "duration": 0.0,
+                                "error": f"earlier file {task['path']} failed"})
+            break
+    return results
+
+
+def _file_group(fp: str) -> str:
+    # Messages with the same natural key only occur in files of the same
+    # channel (date=*/channel=NAME/*.parquet or YYYY-MM-DD/NAME.jsonl).
+    parent = os.path.basename(os.path.dirname(fp))
+    if parent.startswith("channel="):
+        return parent[len("channel="):]
+    return os.path.splitext(os.path.basename(fp))[0]
+
+
+def group_tasks(tasks: List[Dict[str, Any]]) -> List[List[List[Dict[str, Any]]]]:
+    # Returns phases of independent groups. Compacted parts hold each
+    # message once, so each part is its own group; they load before the
+    # (newer) date partitions, which are grouped per channel in date order.
+    compacted = [[t] for t in tasks if f"{os.sep}{COMPACTED_DIR}{os.sep}" in t["fp"]]
+    by_channel: Dict[str, List[Dict[str, Any]]] = {}
+    for t in tasks:
+        if f"{os.sep}{COMPACTED_DIR}{os.sep}" not in t["fp"]:
+            by_channel.setdefault(_file_group(t["fp"]), []).append(t)
+    return [phase for phase in (compacted, list(by_channel.values())) if phase]
+
+
+_worker_conn = None
+_worker_staging_table = STAGING_TABLE
+_worker_options: Dict[str, Any] = {}
+
+
+def _init_worker(slots, options: Dict[str, Any]):
+    # Each worker process has its own connection and staging table
+    global _worker_conn, _worker_staging_table, _worker_options
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+    _worker_staging_table = f"{STAGING_TABLE}_w{slot}"
+    _worker_options = options
+    _worker_conn = psycopg2.connect(POSTGRES_DSN)
+
+
+def _load_group_in_worker(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return load_file_group(_worker_conn, tasks, _worker_options, _worker_staging_table)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Load the raw Telegram datalake into PostgreSQL")
+    parser.add_argument("--mode", choices=("copy", "insert"), default=LOAD_MODE,
+                        help="copy: COPY FROM STDIN into a staging table, then merge (default); "
+                             "insert: execute_values batches with ON CONFLICT")
+    parser.add_argument("--commit-every", type=int, default=COMMIT_EVERY,
+                        help="copy mode: rows per transaction, 0 for a single transaction (default: 100000)")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="insert mode: rows per execute_values batch and commit (default: 1000)")
+    parser.add_argument("--full-reload", action="store_true",
+                        help=f"Load every file, even those {RAW_SCHEMA}.{LEDGER_TABLE} lists as loaded")
+    parser.add_argument("--workers", type=int, default=LOAD_WORKERS,
+                        help="Processes parsing files and writing through their own connection "
+                             f"(default: {LOAD_WORKERS}; 0 for one per CPU)")
+    parser.add_argument("--coerce", choices=("batch", "record"), default="batch",
+                        help="copy mode: coerce a batch of messages column-wise (default) or one record at a time")
+    parser.add_argument("--partition-table", action="store_true",
+                        help=f"Convert an unpartitioned {RAW_SCHEMA}.{RAW_TABLE} to monthly partitions before loading "
+                             "(PostgreSQL 15+)")
+    parser.add_argument("--detach-before", type=str, default="", metavar="YYYY-MM",
+                        help="Detach monthly partitions older than this month, then exit")
+    parser.add_argument("--verify-coercion", action="store_true",
+                        help="Check batch coercion against coerce_record() on every file and exit; "
+                             "does not touch the database")
+    args = parser.parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+    options = {
+        "mode": args.mode,
+        "commit_every": max(0, args.commit_every),
+        "batch_size": max(1, args.batch_size),
+        "coerce": args.coerce,
+    }
+
+    if args.verify_coercion:
+        if RAW_FORMAT == "parquet":
+            messages = iter_parquet_lake_messages(PARQUET_LAKE_BASE)
+        else:
+            messages = iter_json_messages(DATA_LAKE_BASE)
+        checked, mismatches = verify_coercion(messages)
+        for mismatch in mismatches[:20]:
+            print(f"Mismatch {mismatch}")
+        print(f"Verified coercion of {checked} messages: {len(mismatches)} mismatching fields")
+        sys.exit(1 if mismatches else 0)
+
     conn = psycopg2.connect(POSTGRES_DSN)
     try:
         ensure_raw_table(conn)
-        buffer: List[Dict[str, Any]] = []
-        for m in iter_json_messages(DATA_LAKE_BASE):
-            buffer.append(coerce_record(m))
-            if len(buffer) >= 1000:
-                batch_insert(conn, buffer)
-                buffer.clear()
-        if buffer:
-            batch_insert(conn, buffer)
-        print("Load complete")
+        if args.partition_table:
+            moved = migrate_to_partitioned(conn)
+            print(f"Partitioned {RAW_SCHEMA}.{RAW_TABLE} by month ({moved} rows moved)")
+        if args.detach_before:
+            for name in detach_partitions_before(conn, args.detach_before):
+                print(f"Detached {RAW_SCHEMA}.{name}")
+            return
+        ensure_ledger_table(conn)
+        ledger = {} if args.full_reload else read_ledger(conn)
+        if RAW_FORMAT == "parquet":
+            files = iter_parquet_files(PARQUET_LAKE_BASE)
+        else:
+            files = iter_json_files(DATA_LAKE_BASE)
+        lake_root = os.path.abspath(os.path.join(DATA_LAKE_BASE, "..", ".."))
+
+        started = time.perf_counter()
+        tasks = []
+        skipped = 0
+        for fp, entry in files:
+            path = os.path.relpath(fp, lake_root)
+            stat = os.stat(fp)
+            previous = ledger.get(path)
+            if previous and previous[:2] == (stat.st_size, stat.st_mtime):
+                skipped += 1
+                continue
+            if sources_loaded(entry, ledger):
+                record_ledger(conn, path, stat.st_size, stat.st_mtime, entry["sha256"], entry["messages"], 0.0)
+                skipped += 1
+                continue
+            tasks.append({"fp": fp, "path": path, "size": stat.st_size, "mtime": stat.st_mtime,
+                          "entry": entry, "checksum": previous[2] if previous else None,
+                          "whole": loads_whole_file(fp)})
+        if any(not task["whole"] for task in tasks):
+            print("LOAD_SINCE / LOAD_UNTIL / LOAD_MIN_MESSAGE_ID filter Parquet files; "
+                  f"they are not recorded in {RAW_SCHEMA}.{LEDGER_TABLE}")
+
+        phases = group_tasks(tasks)
+        counts = {"loaded": 0, "unchanged": 0, "failed": 0, "malformed": 0, "deferred": 0}
+        rows = 0
+
+        def report(results: List[Dict[str, Any]]):
+            nonlocal rows
+            for result in results:
+                counts[result["status"]] += 1
+                if result["status"] == "loaded":
+                    rows += result["rows"]
+                    elapsed = time.perf_counter() - started
+                    print(f"Loaded {result['path']}: {result['rows']} rows in {result['duration']:.1f}s "
+                          f"({rows} total, {rows / elapsed if elapsed else 0:.0f} rows/sec)")
+                elif result["status"] != "unchanged":
+                    print(f"{result['status'].capitalize()} {result['path']}: {result['error']}")
+
+        if workers <= 1:
+            for phase in phases:
+                for group in phase:
+                    report(load_file_group(conn, group, options))
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            slots = ctx.Value("i", 0)
+            with ctx.Pool(workers, initializer=_init_worker, initargs=(slots, options)) as pool:
+                for phase in phases:
+                    for results in pool.imap_unordered(_load_group_in_worker, phase):
+                        report(results)
+
+        elapsed = time.perf_counter() - started
+        print(f"Load complete: {rows} rows from {counts['loaded']} files in {elapsed:.1f}s "
+              f"({rows / elapsed if elapsed else 0:.0f} rows/sec, mode={args.mode}, workers={workers}); "
+              f"skipped {skipped + counts['unchanged']} unchanged files, "
+              f"{counts['failed']} failed, {counts['malformed']} malformed, {counts['deferred']} deferred")
+        if counts["failed"] or counts["malformed"]:
+            sys.exit(1)
     finally:
         conn.close()
 
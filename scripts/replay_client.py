@@ -0,0 +1,211 @@
+"""
+Offline stand-in for TelegramClient
+===================================
+Replays recorded or synthetic channel histories so scripts/telegram.py can be
+benchmarked and exercised without network access. Supports the subset of the
+TelegramClient API the scraper uses: start(), get_entity(), iter_messages()
+and download_media(), plus `async with`.
+
+Latency is simulated per API request (history pages, entity lookups, media
+downloads) and FloodWaitErrors can be injected every N requests.
+
+Usage:
+    from replay_client import ReplayTelegramClient, synthetic_history
+    client = ReplayTelegramClient({"@demo": synthetic_history(5000)}, page_latency=0.2)
+    client = ReplayTelegramClient.from_datalake("data", "2024-01-31")
+"""
+
+import os
+import glob
+import zlib
+import random
+import asyncio
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+from telethon.tl.types import MessageMediaPhoto
+
+# Telethon fetches history in pages of this many messages.
+HISTORY_PAGE_SIZE = 100
+
+WORDS = (
+    "paracetamol amoxicillin vitamin syrup tablet capsule cream lotion serum "
+    "price birr delivery available order addis ababa pharmacy original stock"
+).split()
+
+
+def synthetic_history(
+    messages: int,
+    photo_ratio: float = 0.3,
+    repost_ratio: float = 0.5,
+    text_words: int = 30,
+    seed: int = 0,
+) -> List[dict]:
+    """
+    Build a synthetic channel history, newest message first.
+
+    photo_ratio is the share of messages with a photo; repost_ratio is the
+    share of those photos that reuse a photo id seen earlier in the channel.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    photo_ids: List[int] = []
+    history = []
+    for message_id in range(1, messages + 1):
+        photo_id = None
+        if rng.random() < photo_ratio:
+            if photo_ids and rng.random() < repost_ratio:
+                photo_id = rng.choice(photo_ids)
+            else:
+                photo_id = seed * 10_000_000 + message_id
+                photo_ids.append(photo_id)
+        history.append({
+            "message_id": message_id,
+            "message_date": (start + timedelta(minutes=message_id)).isoformat(),
+            "message_text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, text_words))),
+            "photo_id": photo_id,
+            "views": rng.randint(0, 10_000),
+            "forwards": rng.randint(0, 100),
+        })
+    history.reverse()
+    return history
+
+
+class ReplayTelegramClient:
+    """
+    Replays `histories` ({channel: [message dicts, newest first]}).
+
+    Message dicts use the datalake field names (message_id, message_date,
+    message_text, views, forwards) plus an optional photo_id. A message with
+    has_media but no photo_id (as in a recorded datalake) gets its
+    message_id as photo id, unless its image_path names a stored blob.
+
+    Args:
+        histories: Channel histories keyed by channel ('@name' or 'name')
+        page_latency: Seconds per history page and entity lookup
+        media_latency: Seconds per photo download
+        photo_bytes: Size of the fake photo written by download_media(),
+            or a {photo_id: path} map of recorded photos to copy
+        flood_every: Raise FloodWaitError on every Nth API request (0 = never)
+        flood_seconds: Wait Telegram asks for in injected FloodWaitErrors
+    """
+
+    def __init__(
+        self,
+        histories: Dict[str, List[dict]],
+        page_latency: float = 0.0,
+        media_latency: float = 0.0,
+        photo_bytes=50_000,
+        flood_every: int = 0,
+        flood_seconds: int = 1,
+    ):
+        self.histories = {channel.strip("@"): history for channel, history in histories.items()}
+        self.page_latency = page_latency
+        self.media_latency = media_latency
+        self.photo_bytes = photo_bytes
+        self.flood_every = flood_every
+        self.flood_seconds = flood_seconds
+        self.requests = 0
+        self.flood_waits = 0
+
+    @classmethod
+    def from_datalake(cls, base_path: str, date_str: str, **kwargs) -> "ReplayTelegramClient":
+        """Replay the NDJSON partitions (and stored photo blobs) of one scraped date."""
+        # Imported here so the synthetic mode has no dependency on the datalake layout.
+        from src.datalake import iter_ndjson_messages
+
+        histories = {}
+        photos = {}
+        partition_dir = os.path.join(base_path, "raw", "telegram_messages", date_str)
+        for fp in sorted(glob.glob(os.path.join(partition_dir, "*.jsonl"))):
+            channel_name = os.path.splitext(os.path.basename(fp))[0]
+            history = []
+            for message in iter_ndjson_messages(fp):
+                image_path = message.get("image_path")
+                if image_path and os.path.exists(image_path):
+                    # Blobs are named after Telegram's photo id; keep reposts shared.
+                    stem = os.path.splitext(os.path.basename(image_path))[0]
+                    photo_id = int(stem) if stem.isdigit() else message["message_id"]
+                    message = dict(message, photo_id=photo_id)
+                    photos[photo_id] = image_path
+                history.append(message)
+            history.sort(key=lambda m: m["message_id"], reverse=True)
+            histories[channel_name] = history
+        kwargs.setdefault("photo_bytes", photos or 50_000)
+        return cls(histories, **kwargs)
+
+    async def _request(self, latency: float) -> None:
+        self.requests += 1
+        if self.flood_every and self.requests % self.flood_every == 0:
+            self.flood_waits += 1
+            raise FloodWaitError(request=None, capture=self.flood_seconds)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+    async def start(self) -> "ReplayTelegramClient":
+        return self
+
+    async def __aenter__(self) -> "ReplayTelegramClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    async def get_entity(self, channel: str):
+        await self._request(self.page_latency)
+        channel_name = channel.strip("@")
+        if channel_name not in self.histories:
+            raise ValueError(f"No replay history for {channel}")
+        return SimpleNamespace(id=zlib.crc32(channel_name.encode("utf-8")), title=channel_name, username=channel_name)
+
+    def _to_message(self, record: dict):
+        photo_id = record.get("photo_id")
+        if photo_id is None and record.get("has_media"):
+            photo_id = record["message_id"]
+        media = MessageMediaPhoto(photo=SimpleNamespace(id=photo_id)) if photo_id is not None else None
+        return SimpleNamespace(
+            id=record["message_id"],
+            date=datetime.fromisoformat(record["message_date"]),
+            message=record.get("message_text", ""),
+            views=record.get("views", 0),
+            forwards=record.get("forwards", 0),
+            media=media,
+        )
+
+    async def iter_messages(
+        self,
+        entity,
+        limit: Optional[int] = None,
+        min_id: int = 0,
+        offset_id: int = 0,
+        reverse: bool = False,
+    ):
+        """Same ordering and filters as TelegramClient.iter_messages for these arguments."""
+        history = self.histories[entity.username]
+        selected = [
+            m for m in history
+            if m["message_id"] > min_id and (not offset_id or m["message_id"] < offset_id)
+        ]
+        if reverse:
+            selected.reverse()
+        if limit is not None:
+            selected = selected[:limit]
+        for index, record in enumerate(selected):
+            if index % HISTORY_PAGE_SIZE == 0:
+                await self._request(self.page_latency)
+            yield self._to_message(record)
+
+    async def download_media(self, media, path: str) -> str:
+        await self._request(self.media_latency)
+        photo_id = media.photo.id
+        if isinstance(self.photo_bytes, dict) and photo_id in self.photo_bytes:
+            with open(self.photo_bytes[photo_id], 'rb') as src:
+                data = src.read()
+        else:
+            size = self.photo_bytes if isinstance(self.photo_bytes, int) else 50_000
+            data = photo_id.to_bytes(8, "big", signed=False) * (size // 8)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
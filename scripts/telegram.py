@@ -2,8 +2,10 @@
 Telegram Scraper for Ethiopian Medical Channels
 ================================================
 This script scrapes public Telegram channels and stores:
-- Raw messages as JSON (partitioned by date): data/raw/telegram_messages/YYYY-MM-DD/channel.json
-- Images: data/raw/images/{channel_name}/{message_id}.jpg
+- Raw messages as NDJSON (partitioned by date): data/raw/telegram_messages/YYYY-MM-DD/channel.jsonl
+- Images (content-addressed, deduplicated): data/raw/images/_blobs/{photo_id}.jpg
+  with a per-channel message index: data/raw/images/{channel_name}/_image_index.json
+- Optional Parquet copy (--parquet): data/raw/telegram_parquet/date=YYYY-MM-DD/channel=NAME/part-0.parquet
 - CSV backup: data/raw/csv/YYYY-MM-DD/telegram_data.csv
 - Logs: logs/scrape_YYYY-MM-DD.log
 
@@ -19,11 +21,17 @@ import csv
 import json
 import asyncio
 import argparse
+import hashlib
 import logging
+import math
 import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, Union
 from dotenv import load_dotenv
 from telethon import TelegramClient
 from telethon.errors import FloodWaitError
@@ -35,7 +43,17 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.datalake import write_channel_messages_json, write_manifest
+from src.datalake import (
+    ImageStore,
+    clear_run_progress,
+    open_channel_message_writer,
+    read_channel_checkpoints,
+    read_run_progress,
+    write_channel_checkpoint,
+    write_channel_parquet,
+    write_channel_progress,
+    write_manifest,
+)
 
 # =============================================================================
 # CONFIGURATION
@@ -56,12 +74,36 @@ if not api_id_str or not api_hash:
 
 api_id = int(api_id_str)
 
+# Session file used when no --sessions pool is given
+DEFAULT_SESSION = "telegram_scraper_session"
+
 # Date string for partitioning output files
 TODAY = datetime.today().strftime("%Y-%m-%d")
 
-# Default throttling (seconds). You can override these via CLI args.
-DEFAULT_CHANNEL_DELAY = 3.0
-DEFAULT_MESSAGE_DELAY = 1.0
+# Default throttling. You can override these via CLI args.
+DEFAULT_CHANNEL_DELAY = 3.0       # seconds paused after finishing a channel
+DEFAULT_REQUEST_RATE = 1.0        # initial API requests per second
+DEFAULT_MIN_REQUEST_RATE = 0.1    # floor after repeated FloodWaitErrors
+DEFAULT_MAX_REQUEST_RATE = 5.0    # ceiling when ramping back up
+DEFAULT_REQUEST_BURST = 5.0       # token bucket capacity
+
+# Number of channels scraped at the same time (1 = sequential).
+DEFAULT_CONCURRENCY = 1
+
+# Telethon fetches history in pages of this many messages.
+HISTORY_PAGE_SIZE = 100
+
+# Prometheus textfile-collector output (relative to --path unless overridden)
+DEFAULT_METRICS_FILE = os.path.join("metrics", "telegram_scraper.prom")
+
+# Media download pipeline: parallel downloads per channel and how many
+# photos may wait for a download before message iteration blocks.
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_DOWNLOAD_QUEUE_SIZE = 32
+
+# Runs that retry a failed channel from its progress record before the
+# interrupted run is given up on and its progress file dropped.
+DEFAULT_RESUME_ATTEMPTS = 3
 
 # =============================================================================
 # LOGGING SETUP
@@ -88,10 +130,304 @@ console_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every channel task that talks to the same
+    Telegram account.
+
+    Only real API requests (entity lookups, history pages, media downloads)
+    call `acquire()`, so text-only messages cost nothing. A FloodWaitError
+    reported through `flood_wait()` pauses all requests for the time Telegram
+    asks for and cuts the rate by `backoff`. After `recovery_period` seconds
+    without another flood wait the rate grows by `increase`, up to `max_rate`.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_REQUEST_RATE,
+        min_rate: float = DEFAULT_MIN_REQUEST_RATE,
+        max_rate: float = DEFAULT_MAX_REQUEST_RATE,
+        burst: float = DEFAULT_REQUEST_BURST,
+        backoff: float = 0.5,
+        increase: float = 1.25,
+        recovery_period: float = 60.0,
+    ):
+        self.initial_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.burst = max(burst, 1.0)
+        self.backoff = backoff
+        self.increase = increase
+        self.recovery_period = recovery_period
+        self.requests = 0
+        self.flood_waits = 0
+        self.lowest_rate = rate
+        self._tokens = self.burst
+        self._lock = asyncio.Lock()
+        self._updated_at: Optional[float] = None
+        self._rate_changed_at: Optional[float] = None
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self._updated_at is None:
+            self._updated_at = now
+            self._rate_changed_at = now
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if now - self._rate_changed_at >= self.recovery_period and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate * self.increase)
+            self._rate_changed_at = now
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                now = loop.time()
+                if self._paused_until > now:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    self.requests += 1
+                    return
+                await asyncio.sleep((cost - self._tokens) / self.rate)
+
+    def flood_wait(self, seconds: float) -> None:
+        """Pause all API requests for `seconds` and back off the rate."""
+        now = asyncio.get_running_loop().time()
+        self._refill(now)
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self.rate = max(self.min_rate, self.rate * self.backoff)
+        self.lowest_rate = min(self.lowest_rate, self.rate)
+        self._rate_changed_at = now
+        self.flood_waits += 1
+
+    def stats(self) -> dict:
+        """Throttle summary for logs and the manifest."""
+        return {
+            "initial_rate": round(self.initial_rate, 3),
+            "settled_rate": round(self.rate, 3),
+            "lowest_rate": round(self.lowest_rate, 3),
+            "api_requests": self.requests,
+            "flood_waits": self.flood_waits,
+        }
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..1) of `values`, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ChannelMetrics:
+    """
+    Throughput counters for one channel in one run, written to the
+    manifest and the Prometheus textfile.
+    """
+
+    LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self):
+        self.messages = 0
+        self.media_downloads = 0
+        self.media_failures = 0
+        self.media_bytes = 0
+        self.download_latencies: List[float] = []
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0.0
+        self.retries = 0
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    def start(self) -> None:
+        self._started = time.monotonic()
+
+    def finish(self) -> None:
+        self._finished = time.monotonic()
+
+    @property
+    def duration(self) -> float:
+        if self._started is None:
+            return 0.0
+        return (self._finished or time.monotonic()) - self._started
+
+    def record_download(self, seconds: float, size: int) -> None:
+        self.media_downloads += 1
+        self.media_bytes += size
+        self.download_latencies.append(seconds)
+
+    def record_flood_wait(self, seconds: float) -> None:
+        self.flood_waits += 1
+        self.flood_wait_seconds += seconds
+
+    def to_dict(self) -> dict:
+        duration = self.duration
+        return {
+            "messages": self.messages,
+            "duration_seconds": round(duration, 3),
+            "messages_per_second": round(self.messages / duration, 3) if duration > 0 else 0.0,
+            "media_downloads": self.media_downloads,
+            "media_failures": self.media_failures,
+            "media_bytes": self.media_bytes,
+            "download_latency_seconds": {
+                f"p{int(q * 100)}": (round(v, 4) if v is not None else None)
+                for q in self.LATENCY_QUANTILES
+                for v in [percentile(self.download_latencies, q)]
+            },
+            "flood_waits": self.flood_waits,
+            "flood_wait_seconds": round(self.flood_wait_seconds, 3),
+            "retries": self.retries,
+        }
+
+
+def write_prometheus_textfile(path: str, channel_metrics: Dict[str, ChannelMetrics]) -> None:
+    """
+    Export per-channel run metrics in the Prometheus text format for the
+    node_exporter textfile collector. The file is replaced atomically so the
+    collector never reads a partial scrape.
+    """
+    gauges = [
+        ("messages", "Messages scraped in the last run", lambda m: m.messages),
+        ("duration_seconds", "Wall time spent scraping the channel", lambda m: m.duration),
+        ("messages_per_second", "Scrape throughput in the last run",
+         lambda m: m.messages / m.duration if m.duration > 0 else 0.0),
+        ("media_downloads", "Photos downloaded in the last run", lambda m: m.media_downloads),
+        ("media_download_failures", "Photo downloads that failed in the last run", lambda m: m.media_failures),
+        ("media_bytes", "Photo bytes downloaded in the last run", lambda m: m.media_bytes),
+        ("flood_waits", "FloodWaitErrors hit in the last run", lambda m: m.flood_waits),
+        ("flood_wait_seconds", "Seconds Telegram asked us to wait in the last run",
+         lambda m: m.flood_wait_seconds),
+        ("retries", "Requests retried in the last run", lambda m: m.retries),
+    ]
+    lines = []
+    for name, help_text, value in gauges:
+        metric = f"telegram_scraper_run_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for channel_name, metrics in channel_metrics.items():
+            lines.append(f'{metric}{{channel="{channel_name}"}} {float(value(metrics)):g}')
+
+    metric = "telegram_scraper_run_media_download_latency_seconds"
+    lines.append(f"# HELP {metric} Photo download latency in the last run")
+    lines.append(f"# TYPE {metric} summary")
+    for channel_name, metrics in channel_metrics.items():
+        for q in ChannelMetrics.LATENCY_QUANTILES:
+            v = percentile(metrics.download_latencies, q)
+            lines.append(f'{metric}{{channel="{channel_name}",quantile="{q}"}} {float(v or 0.0):g}')
+        lines.append(f'{metric}_sum{{channel="{channel_name}"}} {sum(metrics.download_latencies):g}')
+        lines.append(f'{metric}_count{{channel="{channel_name}"}} {len(metrics.download_latencies)}')
+
+    lines.append("# HELP telegram_scraper_last_run_timestamp_seconds Unix time the last run finished")
+    lines.append("# TYPE telegram_scraper_last_run_timestamp_seconds gauge")
+    lines.append(f"telegram_scraper_last_run_timestamp_seconds {time.time():.0f}")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".telegram_scraper.", suffix=".prom.tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, path)
+
+
 # =============================================================================
 # SCRAPING FUNCTIONS
 # =============================================================================
 
+def photo_key(media) -> Optional[str]:
+    """Image store key for a photo: Telegram's photo id, if the media carries one."""
+    photo_id = getattr(getattr(media, "photo", None), "id", None)
+    return str(photo_id) if photo_id is not None else None
+
+
+async def download_worker(
+    client: TelegramClient,
+    queue: asyncio.Queue,
+    limiter: AdaptiveRateLimiter,
+    image_store: ImageStore,
+    inflight: Dict[str, asyncio.Event],
+    max_retries: int = 3,
+    metrics: Optional[ChannelMetrics] = None,
+) -> None:
+    """
+    Drain (message_dict, media, key, done) items from `queue`, download each
+    photo into `image_store` and set message_dict["image_path"] to its blob.
+    Photos without a key are stored under their content hash. If another
+    worker (of any channel) is already downloading the same key, wait for it
+    and reuse its blob. On failure image_path is None, so the JSON/CSV output
+    only points at files that exist. `done` is set either way.
+    """
+    if metrics is None:
+        metrics = ChannelMetrics()
+    while True:
+        message_dict, media, key, done = await queue.get()
+        temp_path = image_store.temp_path(key or f"{message_dict['channel_name']}-{message_dict['message_id']}")
+        try:
+            if key is not None:
+                while key in inflight:
+                    await inflight[key].wait()
+                if image_store.has_blob(key):
+                    message_dict["image_path"] = image_store.blob_path(key)
+                    continue
+                inflight[key] = done
+            retries = 0
+            while True:
+                try:
+                    await limiter.acquire()
+                    started = time.monotonic()
+                    await client.download_media(media, temp_path)
+                    metrics.record_download(time.monotonic() - started, os.path.getsize(temp_path))
+                    message_dict["image_path"] = image_store.commit_blob(temp_path, key)
+                    break
+                except FloodWaitError as e:
+                    wait_seconds = max(int(getattr(e, "seconds", 0) or 0), 1)
+                    limiter.flood_wait(wait_seconds)
+                    metrics.record_flood_wait(wait_seconds)
+                    retries += 1
+                    if retries > max_retries:
+                        raise
+                    metrics.retries += 1
+        except Exception as e:
+            logger.warning(f"Failed to download image for message {message_dict['message_id']}: {e}")
+            metrics.media_failures += 1
+            message_dict["image_path"] = None
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        finally:
+            if key is not None and inflight.get(key) is done:
+                del inflight[key]
+            done.set()
+            queue.task_done()
+
+
+def csv_row(message_dict: dict) -> list:
+    """CSV backup row in the column order of the header."""
+    return [
+        message_dict["message_id"],
+        message_dict["channel_name"],
+        message_dict["channel_title"],
+        message_dict["message_date"],
+        message_dict["message_text"],
+        message_dict["has_media"],
+        message_dict["image_path"],
+        message_dict["views"],
+        message_dict["forwards"],
+    ]
+
+
 async def scrape_channel(
     client: TelegramClient,
     channel: str,
@@ -99,9 +435,18 @@ async def scrape_channel(
     base_path: str,
     date_str: str,
     limit: int = 100,
-    message_delay: float = DEFAULT_MESSAGE_DELAY,
     channel_delay: float = DEFAULT_CHANNEL_DELAY,
     max_retries: int = 3,
+    limiter: Optional[AdaptiveRateLimiter] = None,
+    min_id: int = 0,
+    download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    download_queue_size: int = DEFAULT_DOWNLOAD_QUEUE_SIZE,
+    image_store: Optional[ImageStore] = None,
+    inflight: Optional[Dict[str, asyncio.Event]] = None,
+    resume: Optional[dict] = None,
+    metrics: Optional[ChannelMetrics] = None,
+    parquet: bool = False,
+    csv_file=None,
 ) -> int:
     """
     Scrape a single Telegram channel and save messages + images.
@@ -110,185 +455,485 @@ async def scrape_channel(
         client: Authenticated TelegramClient instance
         channel: Channel username (e.g., '@lobelia4cosmetics')
         writer: CSV writer to append rows
-        image_dir: Directory to save downloaded images
-        json_save_dir: Directory to save JSON output
+        base_path: Base data directory (e.g., 'data')
+        date_str: Date partition to write to (YYYY-MM-DD)
         limit: Maximum number of messages to scrape (default 100)
+        limiter: Shared AdaptiveRateLimiter; every API request goes through it
+        min_id: High-water mark from the previous run. When set, only newer
+            messages are fetched, oldest first, so a run capped by `limit`
+            leaves no gap for the next run to miss. The messages are appended
+            to today's partition and the checkpoint is advanced once the
+            channel completes.
+        download_workers: Photos downloaded in parallel for this channel
+        download_queue_size: Photos that may wait for a worker before
+            message iteration blocks (backpressure)
+        image_store: Content-addressed ImageStore shared by all channels
+        inflight: Photo keys currently being downloaded by any channel,
+            so a repost waits for that download instead of starting another
+        resume: This channel's entry from the progress file of an
+            interrupted run; scraping continues after its last_offset_id
+        metrics: ChannelMetrics to fill in for this run
+        parquet: Also write the finished partition as Parquet
+            (see src.datalake.write_channel_parquet)
+        csv_file: The file behind `writer`; flushed and fsynced before the
+            progress record moves past a batch, so a resumed run has every
+            CSV row it does not rewrite
+    
+    A photo whose blob is already in the image store is not downloaded
+    again; the message just references the existing blob.
+    
+    Messages are streamed to data/raw/telegram_messages/{date}/{channel}.jsonl
+    and the CSV in iteration order. Message iteration only enqueues photos; a
+    pool of download_worker tasks fetches them, and a message is written once
+    its photo has finished or failed, so image_path is always final.
+    
+    A FloodWaitError resumes iteration after the last written message, so
+    nothing is written twice. Every flushed batch also records the channel's
+    progress (data/raw/telegram_messages/_progress.json), and the partition
+    file only replaces the previous one once the channel is done, so a
+    killed process can be resumed the same way. A channel that fails keeps
+    its previous checkpoint; the next run resumes it from its progress
+    record instead, so the messages below the failure point are not skipped.
     
     Returns:
         Number of messages scraped
     """
     channel_name = channel.strip('@')
-    
+    if limiter is None:
+        limiter = AdaptiveRateLimiter()
+    if image_store is None:
+        image_store = ImageStore(os.path.join(base_path, "raw", "images"))
+    if inflight is None:
+        inflight = {}
+    if metrics is None:
+        metrics = ChannelMetrics()
+    metrics.start()
+
+    resume = resume or {}
+    min_id = resume.get("min_id", min_id)
+    written = resume.get("messages_written", 0)
+    last_written_id = resume.get("last_offset_id", 0)
+    highest_id = resume.get("highest_id", 0)
+    attempts = resume.get("attempts", 0) + 1
     retries = 0
-    while True:
-        try:
-            # Get channel entity (validates channel exists and is accessible)
-            entity = await client.get_entity(channel)
-            channel_title = entity.title
-            messages = []
-
-            # Create image directory for this channel
-            # Path format: data/raw/images/{channel_name}/
-            channel_image_dir = os.path.join(base_path, "raw", "images", channel_name)
-            os.makedirs(channel_image_dir, exist_ok=True)
-
-            logger.info(f"Starting scrape of {channel} (limit={limit})")
-
-            # Iterate through channel messages (newest first by default)
-            async for message in client.iter_messages(entity, limit=limit):
-                image_path: Optional[str] = None
-                has_media = message.media is not None
-
-                # Download photo if present
-                # Challenge requires: data/raw/images/{channel_name}/{message_id}.jpg
-                if has_media and isinstance(message.media, MessageMediaPhoto):
-                    filename = f"{message.id}.jpg"
-                    image_path = os.path.join(channel_image_dir, filename)
-                    try:
-                        await client.download_media(message.media, image_path)
-                    except Exception as e:
-                        logger.warning(f"Failed to download image for message {message.id}: {e}")
-                        image_path = None
-
-                # Build message dict with all required fields
-                message_dict = {
-                    "message_id": message.id,
-                    "channel_name": channel_name,
-                    "channel_title": channel_title,
-                    "message_date": message.date.isoformat(),  # ISO format for consistency
-                    "message_text": message.message or "",     # Handle None text
-                    "has_media": has_media,
-                    "image_path": image_path,
-                    "views": message.views or 0,               # Some messages may not have views
-                    "forwards": message.forwards or 0,
-                }
-
-                # Write to CSV (backup/alternative format)
-                writer.writerow([
-                    message_dict["message_id"],
-                    message_dict["channel_name"],
-                    message_dict["channel_title"],
-                    message_dict["message_date"],
-                    message_dict["message_text"],
-                    message_dict["has_media"],
-                    message_dict["image_path"],
-                    message_dict["views"],
-                    message_dict["forwards"],
-                ])
-
-                messages.append(message_dict)
-
-                # Optional delay between messages (reduces risk of rate limiting).
-                if message_delay and message_delay > 0:
-                    await asyncio.sleep(message_delay)
-
-            write_channel_messages_json(
-                base_path=base_path,
-                date_str=date_str,
-                channel_name=channel_name,
-                messages=messages,
-            )
+    status = "failed"
+
+    def record_progress(**state) -> None:
+        write_channel_progress(
+            base_path=base_path,
+            date_str=date_str,
+            channel_name=channel_name,
+            min_id=min_id,
+            last_offset_id=last_written_id,
+            highest_id=highest_id,
+            messages_written=written,
+            attempts=attempts,
+            **state,
+        )
 
-            logger.info(f"Finished scraping {channel}: {len(messages)} messages saved")
+    def on_flush(batch: list) -> None:
+        # The batch is on disk: mirror it to the CSV and image index, then
+        # move the resume point past it.
+        for message_dict in batch:
+            writer.writerow(csv_row(message_dict))
+        if csv_file is not None:
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
+        image_store.save_index(channel_name)
+        record_progress(status="running", bytes_written=sink.bytes_written)
 
-            # Delay between channels (recommended).
-            if channel_delay and channel_delay > 0:
-                await asyncio.sleep(channel_delay)
+    with open_channel_message_writer(
+        base_path=base_path,
+        date_str=date_str,
+        channel_name=channel_name,
+        append=bool(min_id),
+        resume_bytes=resume.get("bytes_written") if resume else None,
+        on_flush=on_flush,
+    ) as sink:
+        record_progress(status="running", bytes_written=sink.bytes_written)
 
-            return len(messages)
+        def emit(message_dict: dict) -> None:
+            nonlocal written, last_written_id, highest_id
+            if message_dict["image_path"]:
+                image_store.record(channel_name, message_dict["message_id"], message_dict["image_path"])
+            # Counters first: sink.write() may flush, and on_flush records them.
+            written += 1
+            metrics.messages += 1
+            last_written_id = message_dict["message_id"]
+            highest_id = max(highest_id, last_written_id)
+            sink.write(message_dict)
 
-        except FloodWaitError as e:
-            # Telegram explicitly asks you to wait e.seconds
-            wait_seconds = int(getattr(e, "seconds", 0) or 0)
-            wait_seconds = max(wait_seconds, 1)
-            logger.warning(f"FloodWaitError for {channel}: sleeping {wait_seconds}s")
-            await asyncio.sleep(wait_seconds)
-            retries += 1
-            if retries > max_retries:
-                logger.error(f"Too many FloodWait retries for {channel}. Skipping.")
-                return 0
-        except Exception as e:
-            logger.error(f"Error scraping {channel}: {e}")
-            return 0
+        while True:
+            try:
+                # Get channel entity (validates channel exists and is accessible)
+                await limiter.acquire()
+                entity = await client.get_entity(channel)
+                channel_title = entity.title
+                remaining = None if limit is None else limit - written
+                if remaining is not None and remaining <= 0:
+                    status = "complete"
+                    break
+
+                logger.info(f"Starting scrape of {channel} (limit={limit}, min_id={min_id}, written={written})")
+
+                # Iterate through channel messages (newest first by default,
+                # oldest first when continuing from a checkpoint). After a
+                # retry, continue past the last message already written.
+                # Telethon fetches a new history page every HISTORY_PAGE_SIZE messages.
+                if min_id:
+                    history = client.iter_messages(
+                        entity, limit=remaining, min_id=max(min_id, last_written_id), reverse=True
+                    )
+                elif last_written_id:
+                    history = client.iter_messages(entity, limit=remaining, offset_id=last_written_id)
+                else:
+                    history = client.iter_messages(entity, limit=remaining)
+
+                downloads: asyncio.Queue = asyncio.Queue(maxsize=max(1, download_queue_size))
+                workers = [
+                    asyncio.create_task(
+                        download_worker(client, downloads, limiter, image_store, inflight, max_retries, metrics)
+                    )
+                    for _ in range(max(1, download_workers))
+                ]
+                # Messages in iteration order, each with the event its photo
+                # download sets (None for messages without a photo).
+                pending: Deque[Tuple[dict, Optional[asyncio.Event]]] = deque()
+
+                def emit_ready() -> None:
+                    while pending and (pending[0][1] is None or pending[0][1].is_set()):
+                        emit(pending.popleft()[0])
+
+                try:
+                    await limiter.acquire()
+                    seen = 0
+                    async for message in history:
+                        seen += 1
+                        if seen % HISTORY_PAGE_SIZE == 0:
+                            await limiter.acquire()
+                        image_path: Optional[str] = None
+                        has_media = message.media is not None
+                        is_photo = has_media and isinstance(message.media, MessageMediaPhoto)
+
+                        # Photos already in the image store are referenced without
+                        # any network call; everything else goes to the workers.
+                        key = photo_key(message.media) if is_photo else None
+                        done: Optional[asyncio.Event] = None
+                        if key is not None and image_store.has_blob(key):
+                            image_path = image_store.blob_path(key)
+                        elif is_photo:
+                            done = asyncio.Event()
+
+                        # Build message dict with all required fields
+                        message_dict = {
+                            "message_id": message.id,
+                            "channel_name": channel_name,
+                            "channel_title": channel_title,
+                            "message_date": message.date.isoformat(),  # ISO format for consistency
+                            "message_text": message.message or "",     # Handle None text
+                            "has_media": has_media,
+                            "image_path": image_path,
+                            "views": message.views or 0,               # Some messages may not have views
+                            "forwards": message.forwards or 0,
+                        }
+
+                        # Hand the photo to the download workers; blocks while the queue is full.
+                        pending.append((message_dict, done))
+                        if done is not None:
+                            await downloads.put((message_dict, message.media, key, done))
+
+                        emit_ready()
+                        # Keep the reorder buffer bounded behind a slow download.
+                        while len(pending) > HISTORY_PAGE_SIZE + download_queue_size:
+                            await pending[0][1].wait()
+                            emit_ready()
+
+                    # Wait until every queued photo has finished or failed.
+                    await downloads.join()
+                    emit_ready()
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                status = "complete"
+                break
+
+            except FloodWaitError as e:
+                # Telegram explicitly asks you to wait e.seconds
+                wait_seconds = int(getattr(e, "seconds", 0) or 0)
+                wait_seconds = max(wait_seconds, 1)
+                logger.warning(f"FloodWaitError for {channel}: pausing API requests for {wait_seconds}s")
+                limiter.flood_wait(wait_seconds)
+                metrics.record_flood_wait(wait_seconds)
+                retries += 1
+                if retries > max_retries:
+                    logger.error(f"Too many FloodWait retries for {channel}. Keeping {written} messages.")
+                    break
+                metrics.retries += 1
+            except Exception as e:
+                logger.error(f"Error scraping {channel}: {e}. Keeping {written} messages.")
+                break
+
+    image_store.save_index(channel_name)
+    # Iteration is newest first unless continuing from min_id, so a failed
+    # channel has not reached the old checkpoint yet; advancing it would
+    # leave the messages below the failure point unscraped.
+    if status == "complete" and highest_id:
+        write_channel_checkpoint(
+            base_path=base_path,
+            channel_name=channel_name,
+            last_message_id=highest_id,
+            date_str=date_str,
+        )
+    if parquet:
+        # CPU-bound conversion; keep the other channels' tasks running meanwhile.
+        await asyncio.to_thread(write_channel_parquet, base_path, date_str, channel_name)
+    record_progress(status=status, bytes_written=sink.bytes_written)
+    metrics.finish()
+
+    summary = metrics.to_dict()
+    logger.info(
+        f"Finished scraping {channel}: {written} messages saved "
+        f"({summary['messages_per_second']} msg/s, {summary['media_bytes']} media bytes, "
+        f"{summary['flood_waits']} flood waits)"
+    )
+
+    # Delay between channels (recommended).
+    if channel_delay and channel_delay > 0:
+        await asyncio.sleep(channel_delay)
+
+    return written
+
+
+def load_session_pool(sessions_file: str) -> List[dict]:
+    """
+    Read a pool of Telegram sessions from a JSON file:
+        [{"session": "scraper_a", "api_id": 123, "api_hash": "..."}, ...]
+    api_id / api_hash default to Tg_API_ID / Tg_API_HASH from .env.
+    """
+    with open(sessions_file, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    pool = []
+    for entry in entries:
+        pool.append({
+            "session": entry["session"],
+            "api_id": int(entry.get("api_id", api_id)),
+            "api_hash": entry.get("api_hash", api_hash),
+        })
+    if not pool:
+        raise ValueError(f"No sessions defined in {sessions_file}")
+    return pool
+
+
+def assign_channel_shards(channels: List[str], sessions: List[str]) -> Dict[str, str]:
+    """
+    Assign each channel to one session with rendezvous hashing.
+
+    The assignment depends only on the channel and session names, so a
+    channel stays on the same account from run to run, and adding or
+    removing a session only moves the channels that hashed to it.
+    """
+    def weight(session: str, channel_name: str) -> int:
+        digest = hashlib.sha1(f"{session}:{channel_name}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    return {
+        channel: max(sessions, key=lambda session: weight(session, channel.strip("@").lower()))
+        for channel in channels
+    }
 
 
 async def scrape_all_channels(
-    client: TelegramClient,
+    client: Union[TelegramClient, Dict[str, TelegramClient]],
     channels: List[str],
     base_path: str,
     limit: int = 100,
-    message_delay: float = DEFAULT_MESSAGE_DELAY,
     channel_delay: float = DEFAULT_CHANNEL_DELAY,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    request_rate: float = DEFAULT_REQUEST_RATE,
+    max_request_rate: float = DEFAULT_MAX_REQUEST_RATE,
+    incremental: bool = True,
+    download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    download_queue_size: int = DEFAULT_DOWNLOAD_QUEUE_SIZE,
+    metrics_file: Optional[str] = None,
+    parquet: bool = False,
+    resume_attempts: int = DEFAULT_RESUME_ATTEMPTS,
 ) -> dict:
     """
     Scrape multiple Telegram channels and organize output.
     
     Args:
-        client: TelegramClient instance (will be started if not already)
+        client: TelegramClient instance (will be started if not already),
+            or a {session_name: TelegramClient} pool. Channels are sharded
+            across the pool with assign_channel_shards().
         channels: List of channel usernames to scrape
         base_path: Base directory for all output (e.g., 'data')
         limit: Max messages per channel
+        concurrency: Max channels scraped at the same time per session.
+            Flood limits apply per account, so each session has its own
+            AdaptiveRateLimiter shared by its channel tasks.
+        request_rate: Initial API requests per second for the limiter
+        max_request_rate: Highest rate the limiter ramps back up to
+        incremental: Continue each channel from its stored high-water mark
+            (data/raw/telegram_messages/_checkpoints.json) instead of
+            re-reading the newest `limit` messages.
+        download_workers: Parallel photo downloads per channel
+        download_queue_size: Pending photos per channel before backpressure
+        metrics_file: Prometheus textfile to export per-channel metrics to
+            (default: {base_path}/metrics/telegram_scraper.prom)
+        parquet: Also write each channel partition as Parquet
+        resume_attempts: Runs that may retry a failed channel of an
+            interrupted run before it is given up on
+    
+    Per-channel throughput metrics are also stored under "channel_metrics"
+    in the manifest.
+    
+    If data/raw/telegram_messages/_progress.json exists, the previous run was
+    interrupted or had failed channels: it is resumed into its original date
+    partition, channels it finished are not scraped again and the others,
+    failed ones included, continue where they stopped. The progress file is
+    kept until every channel has completed or failed resume_attempts runs.
+    
+    All sessions write into the same date partition, CSV and manifest.
     
     Returns:
         Dict with scraping statistics per channel
     """
-    await client.start()
-    logger.info(f"Client authenticated. Scraping {len(channels)} channels...")
+    clients = client if isinstance(client, dict) else {DEFAULT_SESSION: client}
+    for session_client in clients.values():
+        await session_client.start()
+    shards = assign_channel_shards(channels, list(clients))
+    logger.info(f"{len(clients)} client(s) authenticated. Scraping {len(channels)} channels...")
+
+    progress = read_run_progress(base_path)
+    date_str = progress.get("date", TODAY)
+    channel_progress = progress.get("channels", {})
+    if progress:
+        logger.info(f"Resuming interrupted run of {date_str}")
     
     # Setup output directories following challenge spec
-    csv_dir = os.path.join(base_path, "raw", "csv", TODAY)
-    json_dir = os.path.join(base_path, "raw", "telegram_messages", TODAY)
+    csv_dir = os.path.join(base_path, "raw", "csv", date_str)
+    json_dir = os.path.join(base_path, "raw", "telegram_messages", date_str)
     image_dir = os.path.join(base_path, "raw", "images")
     
     os.makedirs(csv_dir, exist_ok=True)
     os.makedirs(json_dir, exist_ok=True)
     os.makedirs(image_dir, exist_ok=True)
     
-    # CSV file with all messages (useful for quick inspection)
+    # CSV file with all messages (useful for quick inspection).
+    # Incremental and resumed runs on the same day append to it.
     csv_file_path = os.path.join(csv_dir, "telegram_data.csv")
     stats = {}
+    checkpoints = read_channel_checkpoints(base_path) if incremental else {}
+    csv_mode = 'a' if (incremental or progress) and os.path.exists(csv_file_path) else 'w'
     
-    with open(csv_file_path, 'w', newline='', encoding='utf-8') as f:
+    with open(csv_file_path, csv_mode, newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         # Header row matching challenge required fields
-        writer.writerow([
-            'message_id',
-            'channel_name', 
-            'channel_title',
-            'message_date',
-            'message_text',
-            'has_media',
-            'image_path',
-            'views',
-            'forwards'
-        ])
+        if csv_mode == 'w':
+            writer.writerow([
+                'message_id',
+                'channel_name',
+                'channel_title',
+                'message_date',
+                'message_text',
+                'has_media',
+                'image_path',
+                'views',
+                'forwards'
+            ])
         
-        channel_counts = {}
-
-        for channel in channels:
-            logger.info(f"Scraping {channel}...")
-            count = await scrape_channel(
-                client=client,
-                channel=channel,
-                writer=writer,
-                base_path=base_path,
-                date_str=TODAY,
-                limit=limit,
-                message_delay=message_delay,
-                channel_delay=channel_delay,
-            )
+        limiters = {
+            session: AdaptiveRateLimiter(rate=request_rate, max_rate=max_request_rate)
+            for session in clients
+        }
+        semaphores = {session: asyncio.Semaphore(max(1, concurrency)) for session in clients}
+        image_store = ImageStore(image_dir)
+        inflight: Dict[str, asyncio.Event] = {}
+        channel_metrics: Dict[str, ChannelMetrics] = {}
+
+        def given_up(state: dict) -> bool:
+            return state.get("status") == "failed" and state.get("attempts", 1) >= resume_attempts
+
+        async def run_channel(channel: str) -> int:
+            state = channel_progress.get(channel.strip("@"))
+            if state and state.get("status") == "complete":
+                logger.info(f"Skipping {channel}: already complete in the interrupted run")
+                return state.get("messages_written", 0)
+            if state and given_up(state):
+                logger.warning(f"Skipping {channel}: failed {state.get('attempts', 1)} runs, giving up")
+                return state.get("messages_written", 0)
+            session = shards[channel]
+            metrics = channel_metrics[channel.strip("@")] = ChannelMetrics()
+            async with semaphores[session]:
+                logger.info(f"Scraping {channel} with session {session}...")
+                return await scrape_channel(
+                    client=clients[session],
+                    channel=channel,
+                    writer=writer,
+                    base_path=base_path,
+                    date_str=date_str,
+                    limit=limit,
+                    channel_delay=channel_delay,
+                    limiter=limiters[session],
+                    min_id=checkpoints.get(channel.strip("@"), {}).get("last_message_id", 0),
+                    download_workers=download_workers,
+                    download_queue_size=download_queue_size,
+                    image_store=image_store,
+                    inflight=inflight,
+                    resume=state,
+                    metrics=metrics,
+                    parquet=parquet,
+                    csv_file=f,
+                )
+
+        # gather() returns results in input order, whatever order the
+        # channels actually finish in.
+        counts = await asyncio.gather(*(run_channel(channel) for channel in channels))
+
+        channel_counts: Dict[str, int] = {}
+        channel_status: Dict[str, str] = {}
+        run_channels = read_run_progress(base_path).get("channels", {})
+        for channel, count in zip(channels, counts):
+            channel_name = channel.strip("@")
             stats[channel] = count
-            channel_counts[channel.strip("@")] = count
+            channel_counts[channel_name] = count
+            channel_status[channel_name] = run_channels.get(channel_name, {}).get("status", "failed")
 
         write_manifest(
             base_path=base_path,
-            date_str=TODAY,
+            date_str=date_str,
             channel_message_counts=channel_counts,
+            append=incremental,
+            extra={
+                "throttle": {session: limiter.stats() for session, limiter in limiters.items()},
+                "channel_sessions": {channel.strip("@"): session for channel, session in shards.items()},
+                "channel_metrics": {name: metrics.to_dict() for name, metrics in channel_metrics.items()},
+            },
+            channel_status=channel_status,
         )
+        unfinished = [
+            name for name in channel_counts
+            if channel_status[name] != "complete" and not given_up(run_channels.get(name, {}))
+        ]
+        if unfinished:
+            logger.warning(f"Keeping run progress to resume {', '.join(sorted(unfinished))} next run")
+        else:
+            clear_run_progress(base_path)
+
+    metrics_file = metrics_file or os.path.join(base_path, DEFAULT_METRICS_FILE)
+    write_prometheus_textfile(metrics_file, channel_metrics)
     
     # Log summary
     total = sum(stats.values())
     logger.info(f"Scraping complete. Total messages: {total}")
+    for session, limiter in limiters.items():
+        throttle = limiter.stats()
+        logger.info(
+            f"[{session}] Request rate settled at {throttle['settled_rate']}/s "
+            f"(started {throttle['initial_rate']}/s, lowest {throttle['lowest_rate']}/s, "
+            f"{throttle['api_requests']} API requests, {throttle['flood_waits']} flood waits)"
+        )
     for ch, count in stats.items():
         logger.info(f"  {ch}: {count} messages")
     
@@ -322,10 +967,16 @@ Examples:
         help="Max messages to scrape per channel (default: 100)"
     )
     parser.add_argument(
-        "--message-delay",
+        "--request-rate",
         type=float,
-        default=DEFAULT_MESSAGE_DELAY,
-        help="Pause (seconds) between processing messages (default: 0)"
+        default=DEFAULT_REQUEST_RATE,
+        help="Initial Telegram API requests per second (default: 1)"
+    )
+    parser.add_argument(
+        "--max-request-rate",
+        type=float,
+        default=DEFAULT_MAX_REQUEST_RATE,
+        help="Ceiling the request rate ramps up to after quiet periods (default: 5)"
     )
     parser.add_argument(
         "--channel-delay",
@@ -333,12 +984,72 @@ Examples:
         default=DEFAULT_CHANNEL_DELAY,
         help="Pause (seconds) after finishing a channel (default: 3)"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Number of channels to scrape concurrently (default: 1)"
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore stored per-channel checkpoints and re-read the newest messages"
+    )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=DEFAULT_DOWNLOAD_WORKERS,
+        help="Parallel photo downloads per channel (default: 4)"
+    )
+    parser.add_argument(
+        "--download-queue-size",
+        type=int,
+        default=DEFAULT_DOWNLOAD_QUEUE_SIZE,
+        help="Photos waiting for download before message iteration pauses (default: 32)"
+    )
+    parser.add_argument(
+        "--channels",
+        type=str,
+        default="",
+        help="Comma-separated channel usernames (default: the challenge channels)"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default="",
+        help="Prometheus textfile for run metrics (default: <path>/metrics/telegram_scraper.prom)"
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write each channel partition as compressed Parquet (needs pyarrow)"
+    )
+    parser.add_argument(
+        "--resume-attempts",
+        type=int,
+        default=DEFAULT_RESUME_ATTEMPTS,
+        help="Runs that retry a failed channel where it stopped before giving up (default: 3)"
+    )
+    parser.add_argument(
+        "--sessions",
+        type=str,
+        default="",
+        help="JSON file with a pool of sessions to shard channels across "
+             "(default: single telegram_scraper_session)"
+    )
     args = parser.parse_args()
     
-    # Initialize Telegram client
-    # Session file stores auth so you don't need to re-login each time
-    client = TelegramClient("telegram_scraper_session", api_id, api_hash)
-    logger.info("Telegram client initialized")
+    # Initialize Telegram clients
+    # Session files store auth so you don't need to re-login each time
+    if args.sessions:
+        session_pool = load_session_pool(args.sessions)
+    else:
+        session_pool = [{"session": DEFAULT_SESSION, "api_id": api_id, "api_hash": api_hash}]
+    clients = {
+        entry["session"]: TelegramClient(entry["session"], entry["api_id"], entry["api_hash"])
+        for entry in session_pool
+    }
+    logger.info(f"Telegram clients initialized: {', '.join(clients)}")
     
     # Target channels from challenge document
     target_channels = [
@@ -348,17 +1059,32 @@ Examples:
         '@medinethiopiainsider' # med in ethiopia
         
     ]
+    if args.channels:
+        target_channels = [
+            c if c.startswith('@') else f'@{c}'
+            for c in (c.strip() for c in args.channels.split(',')) if c
+        ]
     
     async def main() -> None:
         # Python 3.14: prefer asyncio.run() with an async TelegramClient context.
-        async with client:
+        async with AsyncExitStack() as stack:
+            for session_client in clients.values():
+                await stack.enter_async_context(session_client)
             await scrape_all_channels(
-                client,
+                clients,
                 target_channels,
                 args.path,
                 args.limit,
-                message_delay=args.message_delay,
+                request_rate=args.request_rate,
+                max_request_rate=args.max_request_rate,
                 channel_delay=args.channel_delay,
+                concurrency=args.concurrency,
+                incremental=not args.full_refresh,
+                download_workers=args.download_workers,
+                download_queue_size=args.download_queue_size,
+                metrics_file=args.metrics_file or None,
+                parquet=args.parquet,
+                resume_attempts=args.resume_attempts,
             )
 
     asyncio.run(main())
\ No newline at end of file
@@ -1,31 +1,998 @@
 import os
+import glob
 import json
+import shutil
+import hashlib
+import tempfile
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional, Tuple
 
-def write_channel_messages_json(base_path: str, date_str: str, channel_name: str, messages: list):
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for the Parquet sink
+    pa = None
+    pq = None
+
+# Lines buffered by ChannelMessageWriter before they are written and flushed.
+DEFAULT_FLUSH_EVERY = 100
+
+# Characters read at a time when streaming a legacy .json partition file
+JSON_READ_CHUNK_SIZE = 1 << 16
+
+# Parquet sink: rows per row group and compression codec
+DEFAULT_PARQUET_ROW_GROUP_SIZE = 50_000
+DEFAULT_PARQUET_COMPRESSION = "zstd"
+
+# Content-addressed image store layout under data/raw/images/
+IMAGE_BLOB_DIR = "_blobs"
+IMAGE_INDEX_FILE = "_image_index.json"
+
+# Compacted generations of closed partitions under data/raw/telegram_messages/
+COMPACTED_DIR = "_compacted"
+COMPACTED_INDEX_FILE = "_index.json"
+DEFAULT_COMPACT_TARGET_BYTES = 128 * 1024 * 1024
+
+# Compaction deduplicates on the raw loader's natural key: the first non-null
+# of these fields (COALESCE(channel_username, channel_name) over the loader's
+# field aliases, in order) and the message id.
+CHANNEL_KEY_FIELDS = ("chat_username", "channel_username", "channel", "chat_title", "channel_name")
+MESSAGE_ID_FIELDS = ("id", "message_id")
+
+# Version of the manifest / catalog layout; bump when their fields change.
+MANIFEST_FORMAT_VERSION = 2
+CATALOG_FILE = "_catalog.json"
+
+def _atomic_write_json(path: str, data):
+    """
+    Write JSON to path via a temp file in the same directory and rename it
+    into place, so readers never see a half-written file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class ChannelMessageWriter:
+    """
+    Streaming NDJSON writer for one channel partition.
+    Format: data/raw/telegram_messages/YYYY-MM-DD/channel_name.jsonl
+
+    Each message becomes one compact JSON line. Lines are buffered and
+    written in batches of flush_every, so only the current batch is held
+    in memory. Use open_channel_message_writer() as a context manager.
+
+    Lines go to channel_name.jsonl.part, which is renamed over the partition
+    file when the writer closes cleanly. If the process dies, the .part file
+    stays behind; reopening with resume_bytes (the size recorded at the last
+    flush) truncates any torn tail and continues from there. on_flush is
+    called with each flushed batch of messages once it is on disk.
+    """
+
+    def __init__(self, file_path: str, flush_every: int = DEFAULT_FLUSH_EVERY, append: bool = False,
+                 resume_bytes: Optional[int] = None,
+                 on_flush: Optional[Callable[[list], None]] = None):
+        self.path = file_path
+        self.temp_path = f"{file_path}.part"
+        self.flush_every = max(1, flush_every)
+        self.on_flush = on_flush
+        self.count = 0
+        self._buffer = []
+
+        # A .part file that is not being resumed is left over from an
+        # abandoned run and must not leak into this one.
+        if resume_bytes is None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        if append or resume_bytes is not None:
+            if not os.path.exists(self.temp_path) and os.path.exists(file_path):
+                shutil.copyfile(file_path, self.temp_path)
+            self._file = open(self.temp_path, 'ab')
+            if resume_bytes is not None and self._file.tell() > resume_bytes:
+                self._file.truncate(resume_bytes)
+                self._file.seek(resume_bytes)
+        else:
+            self._file = open(self.temp_path, 'wb')
+        self.bytes_written = self._file.tell()
+
+    def write(self, message: dict):
+        self._buffer.append(message)
+        self.count += 1
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            batch = self._buffer
+            self._buffer = []
+            lines = ''.join(json.dumps(m, ensure_ascii=False, separators=(',', ':')) + '\n' for m in batch)
+            self._file.write(lines.encode('utf-8'))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.bytes_written = self._file.tell()
+            if self.on_flush is not None:
+                self.on_flush(batch)
+        else:
+            self._file.flush()
+
+    def close(self, commit: bool = True):
+        """Flush and close; with commit, move the .part file over the partition file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            if commit:
+                os.replace(self.temp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Leave the .part file for a resumed run if the scrape was interrupted.
+        self.close(commit=exc_type is None)
+
+def open_channel_message_writer(base_path: str, date_str: str, channel_name: str,
+                                flush_every: int = DEFAULT_FLUSH_EVERY,
+                                append: bool = False,
+                                resume_bytes: Optional[int] = None,
+                                on_flush: Optional[Callable[[list], None]] = None) -> ChannelMessageWriter:
     """
-    Write channel messages to JSON file partitioned by date.
-    Format: data/raw/telegram_messages/YYYY-MM-DD/channel_name.json
+    Open a streaming NDJSON writer for a channel's date partition.
+    If append is True, lines already in the partition file are kept.
+    resume_bytes continues an interrupted writer (see ChannelMessageWriter).
     """
     json_dir = os.path.join(base_path, "raw", "telegram_messages", date_str)
     os.makedirs(json_dir, exist_ok=True)
-    file_path = os.path.join(json_dir, f"{channel_name}.json")
-    
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(messages, f, ensure_ascii=False, indent=4)
+    file_path = os.path.join(json_dir, f"{channel_name}.jsonl")
+    return ChannelMessageWriter(file_path, flush_every=flush_every, append=append,
+                                resume_bytes=resume_bytes, on_flush=on_flush)
+
+class MalformedPartitionError(ValueError):
+    """A partition file that does not decode: a .json file that is not a list of messages or
+    {"messages": [...]}, or a .jsonl file with an undecodable line before its last one."""
+
+def _is_torn_last_line(line) -> bool:
+    # Every line an NDJSON writer finishes ends with a newline; only the
+    # last line of an interrupted write can lack it.
+    return not line.endswith(b'\n' if isinstance(line, bytes) else '\n')
+
+def iter_ndjson_messages(file_path: str) -> Iterator[dict]:
+    """
+    Stream messages back from an NDJSON partition file, one line at a time.
+    Blank lines are skipped, and so is a torn last line (no trailing newline)
+    left by an interrupted write. Any other line that does not decode raises
+    MalformedPartitionError; messages before it have already been yielded.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                if _is_torn_last_line(line):
+                    return
+                raise MalformedPartitionError(f"{file_path}: undecodable JSON on line {line_number}") from None
+            if isinstance(message, dict):
+                yield message
+
+_NUMBER_START = frozenset("-0123456789")
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+class _JsonStream:
+    """Decodes consecutive JSON values from a text file, holding one chunk (plus the current value) in memory."""
+
+    def __init__(self, file_path: str, f, chunk_size: int):
+        self.path = file_path
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._offset = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def error(self, reason: str) -> MalformedPartitionError:
+        return MalformedPartitionError(f"{self.path}: {reason} at character {self._offset + self._pos}")
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at the end of the file."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise self.error(f"expected {' or '.join(repr(c) for c in chars)}")
+        self._pos += 1
+        return char
 
-def write_manifest(base_path: str, date_str: str, channel_message_counts: dict):
+    def value(self):
+        if self.peek() in _NUMBER_START:
+            # A number split by a chunk boundary ("-2" | ".5e10") decodes as a
+            # shorter valid one; buffer up to the first character that cannot
+            # be part of it (or the end of the file) before decoding.
+            end = self._pos
+            while True:
+                while end < len(self._buffer) and self._buffer[end] in _NUMBER_CHARS:
+                    end += 1
+                if end < len(self._buffer):
+                    break
+                start = self._pos
+                if not self._fill():
+                    break
+                end -= start
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Strings, arrays and objects cut by the chunk end do not decode
+                if self._fill():
+                    continue
+                raise self.error("undecodable JSON value") from None
+            self._pos = end
+            return value
+
+    def iter_array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+def iter_json_partition_messages(file_path: str, chunk_size: int = JSON_READ_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Incrementally decode a legacy .json partition file, a list of messages
+    or {"messages": [...]}, yielding each message as soon as it is read, so
+    memory stays flat however large the file is. Raises
+    MalformedPartitionError for anything else, including a truncated file;
+    messages before the damage have already been yielded.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(file_path, f, chunk_size)
+        opening = stream.peek()
+        if opening == "[":
+            for m in stream.iter_array():
+                if isinstance(m, dict):
+                    yield m
+        elif opening == "{":
+            stream.expect("{")
+            if stream.peek() == "}":
+                stream.expect("}")
+            else:
+                while True:
+                    if stream.peek() != '"':
+                        raise stream.error("expected an object key")
+                    key = stream.value()
+                    stream.expect(":")
+                    if key == "messages" and stream.peek() == "[":
+                        for m in stream.iter_array():
+                            if isinstance(m, dict):
+                                yield m
+                    else:
+                        stream.value()
+                    if stream.expect(",}") == "}":
+                        break
+        else:
+            raise stream.error("expected a list of messages or an object")
+        if stream.peek():
+            raise stream.error("unexpected data after the top-level value")
+
+def iter_partition_file_messages(file_path: str) -> Iterator[dict]:
+    """
+    Stream messages from one partition file: NDJSON (.jsonl), or a legacy
+    .json file holding a list of messages or {"messages": [...]}.
+    A file that does not decode raises MalformedPartitionError.
+    """
+    if file_path.endswith(".jsonl"):
+        return iter_ndjson_messages(file_path)
+    return iter_json_partition_messages(file_path)
+
+def _as_utc(value) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+class _FileStats:
+    """Accumulates size, sha256 and message_id / message_date ranges of a partition file."""
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+        self.bytes = 0
+        self.messages = 0
+        self.min_message_id = None
+        self.max_message_id = None
+        self.min_message_date = None
+        self.max_message_date = None
+
+    def add_bytes(self, chunk: bytes):
+        self._digest.update(chunk)
+        self.bytes += len(chunk)
+
+    def add_message(self, message: dict):
+        self.messages += 1
+        message_id = message.get("message_id", message.get("id"))
+        if isinstance(message_id, int):
+            if self.min_message_id is None or message_id < self.min_message_id:
+                self.min_message_id = message_id
+            if self.max_message_id is None or message_id > self.max_message_id:
+                self.max_message_id = message_id
+        message_date = _as_utc(message.get("message_date", message.get("date")))
+        if message_date is not None:
+            if self.min_message_date is None or message_date < self.min_message_date:
+                self.min_message_date = message_date
+            if self.max_message_date is None or message_date > self.max_message_date:
+                self.max_message_date = message_date
+
+    def to_dict(self) -> dict:
+        return {
+            "bytes": self.bytes,
+            "sha256": self._digest.hexdigest(),
+            "messages": self.messages,
+            "min_message_id": self.min_message_id,
+            "max_message_id": self.max_message_id,
+            "min_message_date": self.min_message_date.isoformat() if self.min_message_date else None,
+            "max_message_date": self.max_message_date.isoformat() if self.max_message_date else None,
+        }
+
+def describe_partition_file(file_path: str) -> dict:
+    """
+    Catalog entry for a partition file: bytes, sha256, message count and
+    min/max message_id and message_date (ISO, UTC), plus its mtime.
+    A file that does not decode (see MalformedPartitionError) is flagged "malformed".
+    """
+    stats = _FileStats()
+    malformed = False
+    if file_path.endswith(".jsonl"):
+        with open(file_path, 'rb') as f:
+            for line in f:
+                stats.add_bytes(line)
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    malformed = malformed or not _is_torn_last_line(line)
+                    continue
+                if isinstance(message, dict):
+                    stats.add_message(message)
+    else:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                stats.add_bytes(chunk)
+        try:
+            for message in iter_partition_file_messages(file_path):
+                stats.add_message(message)
+        except MalformedPartitionError:
+            malformed = True
+    entry = stats.to_dict()
+    if malformed:
+        entry["malformed"] = True
+    entry["mtime"] = os.path.getmtime(file_path)
+    return entry
+
+def catalog_entry_overlaps(entry: dict, min_message_id: Optional[int] = None,
+                           since: Optional[datetime] = None,
+                           until: Optional[datetime] = None) -> bool:
+    """
+    False if a catalog entry's message_id / message_date range lies wholly
+    outside the requested bounds, so the file need not be opened. Entries
+    without stats are always kept. since/until must be timezone-aware.
+    """
+    max_id = entry.get("max_message_id")
+    if min_message_id is not None and max_id is not None and max_id < min_message_id:
+        return False
+    min_date = _as_utc(entry.get("min_message_date"))
+    max_date = _as_utc(entry.get("max_message_date"))
+    if since is not None and max_date is not None and max_date < since:
+        return False
+    if until is not None and min_date is not None and min_date > until:
+        return False
+    return True
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The Parquet sink needs pyarrow: pip install pyarrow")
+
+def parquet_message_schema():
+    """Arrow schema for the message fields scrape_channel builds."""
+    _require_pyarrow()
+    return pa.schema([
+        ("message_id", pa.int64()),
+        ("channel_name", pa.string()),
+        ("channel_title", pa.string()),
+        ("message_date", pa.timestamp("us", tz="UTC")),
+        ("message_text", pa.string()),
+        ("has_media", pa.bool_()),
+        ("image_path", pa.string()),
+        ("views", pa.int64()),
+        ("forwards", pa.int64()),
+    ])
+
+def parquet_partition_path(base_path: str, date_str: str, channel_name: str) -> str:
+    """Format: data/raw/telegram_parquet/date=YYYY-MM-DD/channel=channel_name/part-0.parquet"""
+    return os.path.join(base_path, "raw", "telegram_parquet", f"date={date_str}",
+                        f"channel={channel_name}", "part-0.parquet")
+
+def _parquet_table(messages: List[dict], schema):
+    columns = {name: [] for name in schema.names}
+    for m in messages:
+        for name in schema.names:
+            value = m.get(name)
+            if name == "message_date" and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            columns[name].append(value)
+    return pa.Table.from_pydict(columns, schema=schema)
+
+def write_channel_parquet(base_path: str, date_str: str, channel_name: str,
+                          row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE,
+                          compression: str = DEFAULT_PARQUET_COMPRESSION) -> Optional[str]:
+    """
+    Write a channel's NDJSON date partition as compressed Parquet, with
+    row-group statistics on message_id and message_date for pruning.
+    The NDJSON partition stays the resumable landing file; this is the
+    columnar copy readers should prefer. Streams one row group at a time
+    and replaces the Parquet file atomically. Returns its path.
+    """
+    _require_pyarrow()
+    source = os.path.join(base_path, "raw", "telegram_messages", date_str, f"{channel_name}.jsonl")
+    if not os.path.exists(source):
+        return None
+    file_path = parquet_partition_path(base_path, date_str, channel_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    temp_path = f"{file_path}.part"
+
+    schema = parquet_message_schema()
+    writer = pq.ParquetWriter(temp_path, schema, compression=compression,
+                              write_statistics=["message_id", "message_date"])
+    try:
+        batch = []
+        for message in iter_ndjson_messages(source):
+            batch.append(message)
+            if len(batch) >= row_group_size:
+                writer.write_table(_parquet_table(batch, schema), row_group_size=row_group_size)
+                batch = []
+        if batch:
+            writer.write_table(_parquet_table(batch, schema), row_group_size=row_group_size)
+    finally:
+        writer.close()
+    os.replace(temp_path, file_path)
+    return file_path
+
+def _row_group_in_range(row_group, column_index: int, low, high) -> bool:
+    stats = row_group.column(column_index).statistics
+    if stats is None or not stats.has_min_max:
+        return True
+    if low is not None and stats.max < low:
+        return False
+    if high is not None and stats.min > high:
+        return False
+    return True
+
+def iter_parquet_messages(file_path: str, columns: Optional[List[str]] = None,
+                          min_message_id: Optional[int] = None,
+                          since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> Iterator[dict]:
+    """
+    Stream messages from a Parquet partition file, reading only `columns`
+    and skipping row groups whose message_id / message_date statistics fall
+    outside the requested range. Rows outside the range inside a kept row
+    group are filtered too. message_date is returned as an ISO string, like
+    in the JSON partitions. since/until must be timezone-aware.
+    """
+    _require_pyarrow()
+    parquet_file = pq.ParquetFile(file_path)
+    names = parquet_file.schema_arrow.names
+    id_index = names.index("message_id")
+    date_index = names.index("message_date")
+    row_groups = [
+        i for i in range(parquet_file.num_row_groups)
+        if _row_group_in_range(parquet_file.metadata.row_group(i), id_index, min_message_id, None)
+        and _row_group_in_range(parquet_file.metadata.row_group(i), date_index, since, until)
+    ]
+    if not row_groups:
+        return
+    read_columns = list(columns) if columns else names
+    filter_columns = [c for c, bound in (("message_id", min_message_id), ("message_date", since or until))
+                      if bound is not None and c not in read_columns]
+    for record_batch in parquet_file.iter_batches(row_groups=row_groups, columns=read_columns + filter_columns):
+        for row in record_batch.to_pylist():
+            if min_message_id is not None and row["message_id"] < min_message_id:
+                continue
+            message_date = row.get("message_date")
+            if since is not None and (message_date is None or message_date < since):
+                continue
+            if until is not None and (message_date is None or message_date > until):
+                continue
+            for c in filter_columns:
+                del row[c]
+            if isinstance(message_date, datetime) and "message_date" in row:
+                row["message_date"] = message_date.isoformat()
+            yield row
+
+def write_manifest(base_path: str, date_str: str, channel_message_counts: dict, append: bool = False,
+                   extra: dict = None, channel_status: dict = None):
     """
     Write a manifest file with scraping metadata.
+    If append is True, counts from an earlier run on the same date are added.
+    Keys in extra (e.g. throttle stats of the run) are added to the manifest.
+    channel_status ("complete" / "failed") tells an empty channel apart from
+    one whose scrape broke off.
     """
     manifest_dir = os.path.join(base_path, "raw", "telegram_messages", date_str)
     os.makedirs(manifest_dir, exist_ok=True)
     manifest_path = os.path.join(manifest_dir, "_manifest.json")
+
+    channel_status = dict(channel_status or {})
+    if append and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        channel_message_counts = dict(channel_message_counts)
+        for channel_name, count in previous.get("channel_counts", {}).items():
+            channel_message_counts[channel_name] = channel_message_counts.get(channel_name, 0) + count
+        for channel_name, status in previous.get("channel_status", {}).items():
+            channel_status.setdefault(channel_name, status)
     
     manifest = {
         "scraped_date": date_str,
         "channel_counts": channel_message_counts,
         "total_messages": sum(channel_message_counts.values())
     }
+    if channel_status:
+        manifest["channel_status"] = channel_status
+    if extra:
+        manifest.update(extra)
+    manifest["format_version"] = MANIFEST_FORMAT_VERSION
+    manifest["files"] = {
+        os.path.basename(fp): describe_partition_file(fp) for fp in _partition_files(base_path, date_str)
+    }
     
-    with open(manifest_path, 'w', encoding='utf-8') as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+    _atomic_write_json(manifest_path, manifest)
+    _update_catalog(base_path, dates={date_str: _catalog_date_entry(base_path, date_str, manifest["files"])})
+
+def _catalog_path(base_path: str) -> str:
+    return os.path.join(base_path, "raw", "telegram_messages", CATALOG_FILE)
+
+def read_catalog(base_path: str) -> dict:
+    """
+    Read the catalog of every date partition and the compacted generation.
+    Format: data/raw/telegram_messages/_catalog.json
+    {"format_version": 2, "dates": {date: {"files": {"YYYY-MM-DD/name": entry}, ...}},
+     "compacted": {"generation": N, "parts": [...]}}
+    File entries come from describe_partition_file(); a date entry also
+    carries the totals and ranges of its files.
+    """
+    catalog_path = _catalog_path(base_path)
+    if not os.path.exists(catalog_path):
+        return {}
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _catalog_date_entry(base_path: str, date_str: str, files: dict = None) -> dict:
+    if files is None:
+        files = {os.path.basename(fp): describe_partition_file(fp) for fp in _partition_files(base_path, date_str)}
+    entries = list(files.values())
+
+    def bound(key, pick):
+        values = [e[key] for e in entries if e.get(key) is not None]
+        return pick(values, key=_as_utc if key.endswith("_date") else None) if values else None
+
+    return {
+        "manifest": f"{date_str}/_manifest.json",
+        "messages": sum(e["messages"] for e in entries),
+        "bytes": sum(e["bytes"] for e in entries),
+        "min_message_id": bound("min_message_id", min),
+        "max_message_id": bound("max_message_id", max),
+        "min_message_date": bound("min_message_date", min),
+        "max_message_date": bound("max_message_date", max),
+        "files": {f"{date_str}/{name}": entry for name, entry in files.items()},
+    }
+
+def _update_catalog(base_path: str, dates: dict = None, compacted: dict = None):
+    catalog = read_catalog(base_path)
+    catalog["format_version"] = MANIFEST_FORMAT_VERSION
+    catalog.setdefault("dates", {}).update(dates or {})
+    if compacted is not None:
+        catalog["compacted"] = {
+            "generation": compacted["generation"],
+            "dates": compacted["dates"],
+            "parts": compacted["parts"],
+        }
+    catalog["dates"] = dict(sorted(catalog["dates"].items()))
+    catalog["updated_at"] = datetime.now(timezone.utc).isoformat()
+    _atomic_write_json(_catalog_path(base_path), catalog)
+
+def _checkpoint_path(base_path: str) -> str:
+    return os.path.join(base_path, "raw", "telegram_messages", "_checkpoints.json")
+
+def read_channel_checkpoints(base_path: str) -> dict:
+    """
+    Read the per-channel high-water marks (last scraped message_id).
+    Format: data/raw/telegram_messages/_checkpoints.json
+    """
+    checkpoint_path = _checkpoint_path(base_path)
+    if not os.path.exists(checkpoint_path):
+        return {}
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_channel_checkpoint(base_path: str, channel_name: str, last_message_id: int, date_str: str):
+    """
+    Record the highest message_id scraped for a channel.
+    The mark only ever moves forward.
+    """
+    checkpoints = read_channel_checkpoints(base_path)
+    previous = checkpoints.get(channel_name, {}).get("last_message_id", 0)
+    if last_message_id <= previous:
+        return
+
+    checkpoints[channel_name] = {
+        "last_message_id": last_message_id,
+        "scraped_date": date_str,
+    }
+
+    _atomic_write_json(_checkpoint_path(base_path), checkpoints)
+
+def _progress_path(base_path: str) -> str:
+    return os.path.join(base_path, "raw", "telegram_messages", "_progress.json")
+
+def read_run_progress(base_path: str) -> dict:
+    """
+    Read the progress of an interrupted scrape run, or {} if the last run
+    finished. Format: data/raw/telegram_messages/_progress.json
+    {"date": "YYYY-MM-DD", "channels": {channel_name: {...}}}
+    """
+    progress_path = _progress_path(base_path)
+    if not os.path.exists(progress_path):
+        return {}
+    with open(progress_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_channel_progress(base_path: str, date_str: str, channel_name: str, **state):
+    """
+    Record a channel's progress in the current run: status, last_offset_id,
+    messages_written, bytes_written, etc. Written after every flushed batch
+    so a restarted run can resume without refetching.
+    """
+    progress = read_run_progress(base_path)
+    if progress.get("date") != date_str:
+        progress = {"date": date_str, "channels": {}}
+    channel_state = progress["channels"].setdefault(channel_name, {})
+    channel_state.update(state)
+    channel_state["updated_at"] = datetime.now(timezone.utc).isoformat()
+    _atomic_write_json(_progress_path(base_path), progress)
+
+def clear_run_progress(base_path: str):
+    """Drop the progress file once a run has finished."""
+    progress_path = _progress_path(base_path)
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+
+def _compacted_dir(base_path: str) -> str:
+    return os.path.join(base_path, "raw", "telegram_messages", COMPACTED_DIR)
+
+def read_compaction_index(base_path: str) -> dict:
+    """
+    Read the index of the current compacted generation, or {} if the
+    datalake was never compacted.
+    Format: data/raw/telegram_messages/_compacted/_index.json
+    {"generation": N, "dates": [...], "parts": [{"path", "channel", "sources", "messages", "bytes"}], ...}
+    Part paths are relative to the _compacted directory.
+    """
+    index_path = os.path.join(_compacted_dir(base_path), COMPACTED_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def iter_compacted_messages(base_path: str, min_message_id: Optional[int] = None,
+                            since: Optional[datetime] = None,
+                            until: Optional[datetime] = None) -> Iterator[dict]:
+    """
+    Stream the messages of the current compacted generation, skipping part
+    files whose indexed ranges fall outside the bounds (see
+    catalog_entry_overlaps).
+    """
+    compacted_dir = _compacted_dir(base_path)
+    for part in read_compaction_index(base_path).get("parts", []):
+        if catalog_entry_overlaps(part, min_message_id, since, until):
+            yield from iter_ndjson_messages(os.path.join(compacted_dir, part["path"]))
+
+def closed_partition_dates(base_path: str, today: Optional[str] = None) -> List[str]:
+    """
+    Date partitions that no scrape will write to again: older than today
+    (UTC), not the date of an interrupted run, and without .part files.
+    """
+    messages_dir = os.path.join(base_path, "raw", "telegram_messages")
+    today = today or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    open_date = read_run_progress(base_path).get("date")
+    dates = []
+    for date_dir in sorted(glob.glob(os.path.join(messages_dir, "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"))):
+        date_str = os.path.basename(date_dir)
+        if not os.path.isdir(date_dir) or date_str >= today or date_str == open_date:
+            continue
+        if glob.glob(os.path.join(date_dir, "*.part")):
+            continue
+        dates.append(date_str)
+    return dates
+
+def _partition_files(base_path: str, date_str: str) -> List[str]:
+    date_dir = os.path.join(base_path, "raw", "telegram_messages", date_str)
+    files = glob.glob(os.path.join(date_dir, "*.jsonl")) + glob.glob(os.path.join(date_dir, "*.json"))
+    return sorted(fp for fp in files if not os.path.basename(fp).startswith("_"))
+
+def _file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _first_present(message: dict, fields: Tuple[str, ...]):
+    for field in fields:
+        value = message.get(field)
+        if value is not None:
+            return value
+    return None
+
+def _iter_last_copies(file_path: str) -> Iterator[dict]:
+    """
+    Stream a partition file keeping only the last copy of each
+    (channel, message_id) in it (a rescrape appended to the same date).
+    The first pass keeps only each key's last position, so memory grows
+    with the number of ids rather than with the messages.
+    """
+    last = {}
+    for position, message in enumerate(iter_partition_file_messages(file_path)):
+        message_id = _first_present(message, MESSAGE_ID_FIELDS)
+        if message_id is not None:
+            last[(_first_present(message, CHANNEL_KEY_FIELDS), message_id)] = position
+    for position, message in enumerate(iter_partition_file_messages(file_path)):
+        message_id = _first_present(message, MESSAGE_ID_FIELDS)
+        if message_id is None or last.get((_first_present(message, CHANNEL_KEY_FIELDS), message_id)) == position:
+            yield message
+
+def compact_partitions(base_path: str, target_bytes: int = DEFAULT_COMPACT_TARGET_BYTES,
+                       prune: bool = False, today: Optional[str] = None) -> dict:
+    """
+    Merge the closed date partitions and the previous compacted generation
+    into a new generation of NDJSON part files of about target_bytes each.
+    Format: data/raw/telegram_messages/_compacted/gen-NNNNNN/part-NNNNN.jsonl
+
+    Messages are deduplicated by (channel, message_id), the channel being
+    resolved like the raw loader's channel key (see CHANNEL_KEY_FIELDS) and
+    falling back to the partition file's channel. Each part holds a single
+    channel, recorded as "channel" in its index entry, so messages without
+    channel fields keep their channel in later generations. Messages without
+    an id are deduplicated by content. Each part also lists its "sources":
+    {path relative to base_path: sha256} of the partition files and previous
+    parts its messages came from, so the raw loader can tell a part whose
+    sources it already loaded from new data.
+
+    The newest copy of a message (fresher views and forwards) wins:
+    partitions are read newest date first, only the last copy within a
+    file is kept, and the previous generation is read last. Compacting again without new
+    partitions writes the same messages.
+
+    The index is swapped in atomically once every part is on disk, then
+    older generations are removed. With prune, the message files of the
+    compacted dates are deleted (their _manifest.json stays).
+    Returns the new index.
+    """
+    compacted_dir = _compacted_dir(base_path)
+    previous = read_compaction_index(base_path)
+    dates = sorted(set(closed_partition_dates(base_path, today)) | set(previous.get("dates", [])), reverse=True)
+    generation = previous.get("generation", 0) + 1
+    generation_name = f"gen-{generation:06d}"
+    generation_dir = os.path.join(compacted_dir, generation_name)
+    if os.path.exists(generation_dir):
+        shutil.rmtree(generation_dir)
+    os.makedirs(generation_dir)
+
+    # Source files grouped by channel, so only one channel's parts are open
+    # at a time, newest first: [(file, fallback channel, compacted, sha256)]
+    groups = {}
+    for date_str in dates:
+        for fp in _partition_files(base_path, date_str):
+            stem = os.path.splitext(os.path.basename(fp))[0]
+            groups.setdefault(stem, []).append((fp, stem, False, _file_sha256(fp)))
+    for part in previous.get("parts", []):
+        channel = part.get("channel")
+        groups.setdefault("" if channel is None else str(channel), []).append(
+            (os.path.join(compacted_dir, part["path"]), channel, True, part.get("sha256")))
+
+    def messages(fp, compacted):
+        if compacted:
+            return iter_ndjson_messages(fp)
+        # A resumed scrape appends fresher copies after older ones
+        return _iter_last_copies(fp)
+
+    seen = set()
+    parts = []
+    open_parts = {}
+    read = 0
+
+    def close_part(channel):
+        part_file, part_stats, part = open_parts.pop(channel)
+        part_file.flush()
+        os.fsync(part_file.fileno())
+        part_file.close()
+        part.update(part_stats.to_dict())
+
+    try:
+        for group in sorted(groups):
+            for fp, fallback, compacted, sha256 in groups[group]:
+                source = os.path.relpath(fp, base_path)
+                for message in messages(fp, compacted):
+                    read += 1
+                    channel = _first_present(message, CHANNEL_KEY_FIELDS)
+                    if channel is None:
+                        channel = fallback
+                    line = (json.dumps(message, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+                    message_id = _first_present(message, MESSAGE_ID_FIELDS)
+                    key = (channel, message_id) if message_id is not None else (channel, None, line)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if channel not in open_parts:
+                        part_name = f"part-{len(parts):05d}.jsonl"
+                        parts.append({"path": f"{generation_name}/{part_name}", "channel": channel, "sources": {}})
+                        open_parts[channel] = (open(os.path.join(generation_dir, part_name), 'wb'),
+                                               _FileStats(), parts[-1])
+                    part_file, part_stats, part = open_parts[channel]
+                    part["sources"][source] = sha256
+                    part_file.write(line)
+                    part_stats.add_bytes(line)
+                    part_stats.add_message(message)
+                    if part_stats.bytes >= target_bytes:
+                        close_part(channel)
+            for channel in list(open_parts):
+                close_part(channel)
+    except BaseException:
+        for part_file, _, _ in open_parts.values():
+            part_file.close()
+        shutil.rmtree(generation_dir, ignore_errors=True)
+        raise
+
+    written = sum(part["messages"] for part in parts)
+    index = {
+        "generation": generation,
+        "dates": sorted(dates),
+        "parts": parts,
+        "messages": written,
+        "duplicates_dropped": read - written,
+        "compacted_at": datetime.now(timezone.utc).isoformat(),
+    }
+    _atomic_write_json(os.path.join(compacted_dir, COMPACTED_INDEX_FILE), index)
+    _update_catalog(base_path, compacted=index)
+
+    for old_dir in glob.glob(os.path.join(compacted_dir, "gen-*")):
+        if os.path.basename(old_dir) != generation_name:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    if prune:
+        for date_str in dates:
+            for fp in _partition_files(base_path, date_str):
+                os.remove(fp)
+        _update_catalog(base_path, dates={date_str: _catalog_date_entry(base_path, date_str) for date_str in dates})
+    return index
+
+
+class ImageStore:
+    """
+    Content-addressed store for downloaded photos.
+    Blobs: data/raw/images/_blobs/{key}.jpg
+    Index: data/raw/images/{channel_name}/_image_index.json ({message_id: blob path})
+
+    A blob is keyed by Telegram's photo id when it is known before the
+    download, otherwise by the sha256 of its content, so a reposted photo is
+    stored once and every message that carries it points at the same blob.
+    """
+
+    def __init__(self, image_dir: str):
+        self.image_dir = image_dir
+        self.blob_dir = os.path.join(image_dir, IMAGE_BLOB_DIR)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._pending = {}
+
+    def blob_path(self, key: str) -> str:
+        return os.path.join(self.blob_dir, f"{key}.jpg")
+
+    def has_blob(self, key: str) -> bool:
+        return os.path.exists(self.blob_path(key))
+
+    def temp_path(self, name: str) -> str:
+        """Download target for a blob; commit_blob() moves it into place."""
+        return os.path.join(self.blob_dir, f".{name}.part")
+
+    def commit_blob(self, temp_path: str, key: Optional[str] = None) -> str:
+        """
+        Move a finished download into the store and return its blob path.
+        Without a key the blob is named after its sha256; if that content is
+        already stored the download is dropped.
+        """
+        if key is None:
+            digest = hashlib.sha256()
+            with open(temp_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            key = f"sha256-{digest.hexdigest()}"
+        blob_path = self.blob_path(key)
+        if os.path.exists(blob_path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, blob_path)
+        return blob_path
+
+    def record(self, channel_name: str, message_id: int, blob_path: str):
+        """Map a message to its blob; written out by save_index()."""
+        self._pending.setdefault(channel_name, {})[str(message_id)] = os.path.relpath(blob_path, self.image_dir)
+
+    def save_index(self, channel_name: str):
+        """Merge recorded mappings into the channel's index file."""
+        entries = self._pending.pop(channel_name, None)
+        if not entries:
+            return
+        index = read_image_index(self.image_dir, channel_name)
+        index.update(entries)
+        _atomic_write_json(os.path.join(self.image_dir, channel_name, IMAGE_INDEX_FILE), index)
+
+def read_image_index(image_dir: str, channel_name: str) -> dict:
+    """Read a channel's {message_id: blob path} index (paths relative to image_dir)."""
+    index_path = os.path.join(image_dir, channel_name, IMAGE_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def iter_message_images(image_dir: str) -> Iterator[Tuple[str, int, str]]:
+    """
+    Yield (channel_name, message_id, image_path) for every message with a
+    stored photo: indexed blobs first, then legacy
+    data/raw/images/{channel_name}/{message_id}.jpg files.
+    Several messages may share one image_path.
+    """
+    for channel_dir in sorted(glob.glob(os.path.join(image_dir, "*"))):
+        channel_name = os.path.basename(channel_dir)
+        if channel_name == IMAGE_BLOB_DIR or not os.path.isdir(channel_dir):
+            continue
+        index = read_image_index(image_dir, channel_name)
+        for message_id, rel_path in index.items():
+            blob_path = os.path.join(image_dir, rel_path)
+            if os.path.exists(blob_path):
+                yield channel_name, int(message_id), blob_path
+        for image_path in sorted(glob.glob(os.path.join(channel_dir, "*.jpg"))):
+            stem = os.path.splitext(os.path.basename(image_path))[0]
+            if stem.isdigit() and stem not in index:
+                yield channel_name, int(stem), image_path
@@ -0,0 +1,155 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from load_raw_to_postgres import (  # noqa: E402
+    DATE_FORMATS,
+    RAW_COLUMNS,
+    _natural_key,
+    _same_value,
+    coerce_batch,
+    coerce_record,
+    iter_coerced_rows,
+    verify_coercion,
+)
+
+
+MESSAGES = [
+    # Scraper, Telethon and warehouse spellings
+    {"message_id": 1, "channel_name": "chan", "message_date": "2024-01-05T10:20:30+00:00",
+     "message_text": "hi", "has_media": True, "views": 10, "forwards": 1},
+    {"id": 2, "chat_id": -100, "chat_username": "chan", "chat_title": "Chan", "date": "2024-01-05 10:20:30",
+     "message": "hi", "photo": None, "views": 20, "forwards": 2},
+    {"message_id": 3, "channel_username": "chan", "channel_name": "Chan", "message_date": "2024-01-05T10:20:30+0300",
+     "message_text": "hi", "has_image": False, "view_count": 30, "forward_count": 3},
+    # Several aliases of one field: the first non-null in FIELD_ALIASES order wins
+    {"id": 4, "message_id": 40, "text": "text", "message": "message", "message_text": "message_text",
+     "views": None, "view_count": 44, "has_image": None, "has_media": 0, "photo": {"id": 1}},
+    {"id": None, "message_id": 5, "chat_username": None, "channel": "chan", "date": None,
+     "message_date": "2024-01-05T10:20:30"},
+    # Missing and null fields
+    {},
+    {"id": 6},
+    {"id": None, "message_id": None, "date": None, "views": None, "has_media": None},
+    # Non-numeric and unusual values pass through unchanged
+    {"id": "7", "views": "1.2K", "forwards": "", "has_media": "yes"},
+    {"id": 8, "views": 3.5, "forwards": -1, "has_image": []},
+    # Dates that are not strings are not parsed
+    {"id": 9, "date": 1704450030},
+    {"id": 10, "date": {"seconds": 1}},
+]
+
+# Every DATE_FORMATS layout, naive and with Z / offsets, plus strings that
+# none of them (or only strptime) accepts.
+DATES = [
+    "2024-01-05T10:20:30+00:00",
+    "2024-01-05T10:20:30+0000",
+    "2024-01-05T10:20:30Z",
+    "2024-01-05T10:20:30+03:00",
+    "2024-01-05T10:20:30-0530",
+    "2024-01-05 10:20:30+00:00",
+    "2024-01-05 10:20:30+0200",
+    "2024-01-05 10:20:30Z",
+    "2024-01-05 10:20:30",
+    "2024-01-05T10:20:30",
+    "2024-1-5 10:20:30",
+    "2024-01-05T10:20:30.123456+00:00",
+    "2024-01-05T10:20",
+    "2024-01-05",
+    "2024-02-30T10:20:30",
+    "2024-01-05T24:00:00",
+    "05/01/2024 10:20:30",
+    " 2024-01-05 10:20:30",
+    "",
+]
+
+
+def assert_same_rows(messages):
+    columns = coerce_batch(messages)
+    for i, m in enumerate(messages):
+        expected = coerce_record(m)
+        for c in RAW_COLUMNS:
+            assert _same_value(expected[c], columns[c][i]), (c, expected[c], columns[c][i], m)
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_batch_matches_record(message):
+    assert_same_rows([message])
+
+
+def test_batch_of_mixed_layouts_matches_record():
+    # Alias plans are cached per key layout; interleave the layouts
+    assert_same_rows(MESSAGES + MESSAGES[::-1])
+
+
+@pytest.mark.parametrize("date", DATES)
+@pytest.mark.parametrize("field", ["date", "message_date"])
+def test_dates_match_record(field, date):
+    assert_same_rows([{"id": 1, field: date}])
+
+
+def test_repeated_dates_in_one_batch_match_record():
+    # Each distinct timestamp string is parsed once per batch
+    assert_same_rows([{"id": i, "date": date} for i, date in enumerate(DATES * 2)])
+
+
+def test_every_date_format_is_covered():
+    covered = set()
+    for date in DATES:
+        for fmt in DATE_FORMATS:
+            try:
+                datetime.strptime(date, fmt)
+            except ValueError:
+                continue
+            covered.add(fmt)
+            break
+    assert covered == set(DATE_FORMATS)
+
+
+def test_naive_and_aware_dates_stay_apart():
+    columns = coerce_batch([
+        {"date": "2024-01-05 10:20:30"},
+        {"date": "2024-01-05T10:20:30Z"},
+        {"date": "2024-01-05T10:20:30+03:00"},
+    ])
+    naive, utc, offset = columns["message_date"]
+    assert naive == datetime(2024, 1, 5, 10, 20, 30) and naive.tzinfo is None
+    assert utc == datetime(2024, 1, 5, 10, 20, 30, tzinfo=timezone.utc)
+    assert offset.utcoffset() == timedelta(hours=3)
+
+
+def test_coerced_rows_follow_raw_columns():
+    rows = list(iter_coerced_rows(iter(MESSAGES), batch_size=3))
+    assert len(rows) == len(MESSAGES)
+    for row, m in zip(rows, MESSAGES):
+        expected = coerce_record(m)
+        assert all(_same_value(expected[c], v) for c, v in zip(RAW_COLUMNS, row))
+
+
+def test_verify_coercion_finds_no_mismatches():
+    messages = MESSAGES + [{"id": 1, "date": date} for date in DATES]
+    assert verify_coercion(iter(messages), batch_size=7) == (len(messages), [])
+
+
+@pytest.mark.parametrize("row, channel_key", [
+    ({"channel_username": "user", "channel_name": "Name"}, "user"),
+    ({"channel_username": None, "channel_name": "Name"}, "Name"),
+    # COALESCE skips only NULLs: an empty username is the key
+    ({"channel_username": "", "channel_name": "Name"}, ""),
+    ({"channel_username": None, "channel_name": ""}, ""),
+    ({}, ""),
+])
+def test_natural_key_mirrors_channel_key(row, channel_key):
+    assert _natural_key({**row, "message_id": 1}) == (channel_key, 1)
+
+
+def test_partitioned_natural_key_includes_message_date():
+    date = datetime(2024, 1, 5, tzinfo=timezone.utc)
+    assert _natural_key({"channel_name": "c", "message_id": 1, "message_date": date}, partitioned=True) == \
+        ("c", 1, date)
@@ -0,0 +1,105 @@
+import os
+import json
+
+import pytest
+
+from src.datalake import compact_partitions, iter_compacted_messages, read_compaction_index
+
+
+def write_partition(base_path, date_str, channel, messages):
+    date_dir = os.path.join(base_path, "raw", "telegram_messages", date_str)
+    os.makedirs(date_dir, exist_ok=True)
+    with open(os.path.join(date_dir, f"{channel}.jsonl"), "w", encoding="utf-8") as f:
+        for message in messages:
+            f.write(json.dumps(message) + "\n")
+
+
+def compacted(base_path):
+    return sorted(json.dumps(m, sort_keys=True) for m in iter_compacted_messages(base_path))
+
+
+@pytest.fixture
+def lake(tmp_path):
+    base = str(tmp_path)
+    # Channel-less messages (only the file name tells the channel apart),
+    # the loader's field aliases, id-less messages and rescrapes with
+    # fresher counters, both on a later date and later in the same file.
+    write_partition(base, "2024-01-01", "chan_a", [
+        {"id": 1, "date": "2024-01-01 10:00:00", "views": 10},
+        {"id": 2, "date": "2024-01-01 11:00:00", "views": 20},
+        {"id": 2, "date": "2024-01-01 11:00:00", "views": 25},
+        {"text": "no id", "date": "2024-01-01 12:00:00"},
+    ])
+    write_partition(base, "2024-01-01", "chan_b", [
+        {"id": 1, "date": "2024-01-01 10:00:00", "views": 5},
+        {"message_id": 2, "chat_username": "chan_b", "message_date": "2024-01-01T11:00:00", "views": 7},
+    ])
+    write_partition(base, "2024-01-02", "chan_a", [
+        {"id": 1, "date": "2024-01-01 10:00:00", "views": 15},
+        {"id": 3, "date": "2024-01-02 09:00:00", "views": 30},
+    ])
+    write_partition(base, "2024-01-02", "chan_b", [
+        {"message_id": 2, "channel_username": "chan_b", "message_date": "2024-01-01T11:00:00", "views": 9},
+    ])
+    return base
+
+
+def test_compaction_keeps_channels_apart_and_newest_copies(lake):
+    index = compact_partitions(lake, today="2024-01-03")
+
+    assert index["messages"] == 6
+    assert compacted(lake) == sorted(json.dumps(m, sort_keys=True) for m in [
+        {"id": 1, "date": "2024-01-01 10:00:00", "views": 15},
+        {"id": 2, "date": "2024-01-01 11:00:00", "views": 25},
+        {"id": 3, "date": "2024-01-02 09:00:00", "views": 30},
+        {"text": "no id", "date": "2024-01-01 12:00:00"},
+        {"id": 1, "date": "2024-01-01 10:00:00", "views": 5},
+        {"message_id": 2, "channel_username": "chan_b", "message_date": "2024-01-01T11:00:00", "views": 9},
+    ])
+    assert {part["channel"] for part in index["parts"]} == {"chan_a", "chan_b"}
+
+
+@pytest.mark.parametrize("prune", [False, True])
+def test_compacting_twice_is_a_no_op(lake, prune):
+    first = compact_partitions(lake, prune=prune, today="2024-01-03")
+    messages = compacted(lake)
+
+    second = compact_partitions(lake, prune=prune, today="2024-01-03")
+
+    assert compacted(lake) == messages
+    assert second["messages"] == first["messages"]
+    assert second["generation"] == first["generation"] + 1
+    assert [(p["channel"], p["messages"], p["sha256"]) for p in second["parts"]] == \
+        [(p["channel"], p["messages"], p["sha256"]) for p in first["parts"]]
+    assert read_compaction_index(lake) == second
+
+
+def test_pruned_compaction_merges_new_partitions_into_previous_generation(lake):
+    compact_partitions(lake, prune=True, today="2024-01-03")
+    write_partition(lake, "2024-01-03", "chan_a", [
+        {"id": 3, "date": "2024-01-02 09:00:00", "views": 40},
+        {"id": 4, "date": "2024-01-03 09:00:00", "views": 1},
+    ])
+
+    index = compact_partitions(lake, prune=True, today="2024-01-04")
+
+    assert index["messages"] == 7
+    chan_a = [m for m in iter_compacted_messages(lake) if m.get("id") in (3, 4)]
+    assert sorted((m["id"], m["views"]) for m in chan_a) == [(3, 40), (4, 1)]
+
+
+def test_last_copy_in_a_legacy_json_partition_wins(tmp_path):
+    base = str(tmp_path)
+    date_dir = os.path.join(base, "raw", "telegram_messages", "2024-01-01")
+    os.makedirs(date_dir)
+    with open(os.path.join(date_dir, "chan_c.json"), "w", encoding="utf-8") as f:
+        json.dump({"messages": [
+            {"id": 1, "views": 1},
+            {"id": 2, "views": 2},
+            {"id": 1, "views": 3},
+            {"id": 1, "views": 4},
+        ]}, f)
+
+    compact_partitions(base, today="2024-01-02")
+
+    assert sorted((m["id"], m["views"]) for m in iter_compacted_messages(base)) == [(1, 4), (2, 2)]
@@ -0,0 +1,113 @@
+import json
+import random
+
+import pytest
+
+from src.datalake import (
+    MalformedPartitionError,
+    describe_partition_file,
+    iter_json_partition_messages,
+    iter_partition_file_messages,
+)
+
+MESSAGES = [
+    {"id": 1, "views": -2.5e10, "text": "a \"quoted\" \\ line\nwith unicode éሴ", "ok": True},
+    {"id": 22, "views": 1.5, "forwards": -0.0, "photo": None, "tags": [1, [2, {"x": 3}], []], "e": {}},
+    {"id": 333, "views": 12345678901234567890, "ratio": 1e-7, "big": 6.02E+23, "flag": False},
+]
+
+DOCUMENTS = {
+    "list": [MESSAGES[0], -2.5e10, MESSAGES[1], "skipped", 15, MESSAGES[2], None, 1.0],
+    "object": {"total": 1.5, "messages": MESSAGES, "next": -12, "pages": [1.25, 2e3], "done": True},
+    "object_messages_last": {"count": 100, "meta": {"n": -7.5}, "messages": MESSAGES + [0.5]},
+    "empty_list": [],
+    "empty_object": {},
+    "no_messages": {"total": 0},
+}
+
+
+def expected_messages(document):
+    if isinstance(document, dict):
+        document = document.get("messages", [])
+    return [m for m in document if isinstance(m, dict)]
+
+
+def write_document(tmp_path, text):
+    fp = tmp_path / "partition.json"
+    fp.write_text(text, encoding="utf-8")
+    return str(fp)
+
+
+@pytest.mark.parametrize("name", DOCUMENTS)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_matches_json_load_at_every_chunk_size(tmp_path, name, indent):
+    text = json.dumps(DOCUMENTS[name], indent=indent, ensure_ascii=False)
+    fp = write_document(tmp_path, text)
+    with open(fp, encoding="utf-8") as f:
+        expected = expected_messages(json.load(f))
+
+    for chunk_size in range(1, len(text) + 2):
+        assert list(iter_json_partition_messages(fp, chunk_size=chunk_size)) == expected, chunk_size
+
+
+@pytest.mark.parametrize("number", ["-2.5e10", "1.5", "-0.25", "10", "1E+5", "7e-3", "-1234567.875"])
+def test_numbers_split_across_chunks(tmp_path, number):
+    text = f'{{"total": {number}, "messages": [{{"id": 1, "v": {number}}}, {number}, {{"id": 2}}], "n": {number}}}'
+    fp = write_document(tmp_path, text)
+
+    for chunk_size in range(1, len(text) + 1):
+        assert list(iter_json_partition_messages(fp, chunk_size=chunk_size)) == \
+            [{"id": 1, "v": json.loads(number)}, {"id": 2}], chunk_size
+
+
+def _random_value(rng, depth):
+    kind = rng.randrange(7 if depth < 3 else 4)
+    if kind == 0:
+        return rng.choice([True, False, None])
+    if kind == 1:
+        return rng.randint(-10 ** 12, 10 ** 12)
+    if kind == 2:
+        return rng.uniform(-1e6, 1e6) * 10 ** rng.randint(-12, 12)
+    if kind == 3:
+        return "".join(rng.choice('ab "\\\né') for _ in range(rng.randrange(6)))
+    if kind == 4:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {f"k{i}": _random_value(rng, depth + 1) for i in range(rng.randrange(4))}
+
+
+def test_random_documents_match_json_load(tmp_path):
+    rng = random.Random(0)
+    for _ in range(100):
+        values = [_random_value(rng, 1) for _ in range(rng.randrange(6))]
+        document = values if rng.random() < 0.5 else {"a": _random_value(rng, 1), "messages": values,
+                                                      "z": _random_value(rng, 1)}
+        text = json.dumps(document, indent=rng.choice([None, 1]))
+        fp = write_document(tmp_path, text)
+        for chunk_size in (1, 2, 3, 5, 7, 16):
+            assert list(iter_json_partition_messages(fp, chunk_size=chunk_size)) == expected_messages(document)
+
+
+@pytest.mark.parametrize("text", [
+    '[{"id": 1}, {"id": 2}',
+    '[{"id": 1}, {"id": 2},',
+    '[{"id": 1}, {"id": 2',
+    '{"messages": [{"id": 1}]',
+    '{"messages": [{"id": 1}], "total": 1.',
+    '[{"id": 1}, -]',
+    '[{"id": 1} {"id": 2}]',
+    '[{"id": 1}, 1.5.5]',
+    '[{"id": 1}, 2.]',
+    '{"messages": [{"id": 1}], total: 1}',
+    '[{"id": 1}] trailing',
+    '"not a list of messages"',
+    '',
+])
+def test_malformed_and_truncated_files_raise(tmp_path, text):
+    fp = write_document(tmp_path, text)
+
+    for chunk_size in (1, 3, 1 << 16):
+        with pytest.raises(MalformedPartitionError):
+            list(iter_json_partition_messages(fp, chunk_size=chunk_size))
+    with pytest.raises(MalformedPartitionError):
+        list(iter_partition_file_messages(fp))
+    assert describe_partition_file(fp)["malformed"] is True
@@ -0,0 +1,120 @@
+import os
+import json
+
+import pytest
+
+from src.datalake import (
+    MalformedPartitionError,
+    describe_partition_file,
+    iter_ndjson_messages,
+    open_channel_message_writer,
+)
+
+
+def write_lines(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_messages_stream_back_in_order(tmp_path):
+    fp = write_lines(tmp_path / "c.jsonl", "".join(json.dumps({"id": i}) + "\n" for i in range(5)))
+
+    assert [m["id"] for m in iter_ndjson_messages(fp)] == list(range(5))
+
+
+def test_blank_lines_and_non_objects_are_skipped(tmp_path):
+    fp = write_lines(tmp_path / "c.jsonl", '{"id": 1}\n\n   \n[1, 2]\n{"id": 2}\n')
+
+    assert list(iter_ndjson_messages(fp)) == [{"id": 1}, {"id": 2}]
+
+
+@pytest.mark.parametrize("torn", ['{"id": 3, "text": "cut', '{', '{"id": 3}{'])
+def test_torn_last_line_is_tolerated(tmp_path, torn):
+    # An interrupted write leaves a last line without its newline
+    fp = write_lines(tmp_path / "c.jsonl", '{"id": 1}\n{"id": 2}\n' + torn)
+
+    assert list(iter_ndjson_messages(fp)) == [{"id": 1}, {"id": 2}]
+    assert "malformed" not in describe_partition_file(fp)
+
+
+@pytest.mark.parametrize("corrupt", ['{"id": 2', "not json", '{"id": 2}}'])
+def test_corruption_mid_file_raises(tmp_path, corrupt):
+    fp = write_lines(tmp_path / "c.jsonl", '{"id": 1}\n' + corrupt + '\n{"id": 3}\n')
+
+    messages = iter_ndjson_messages(fp)
+    assert next(messages) == {"id": 1}
+    with pytest.raises(MalformedPartitionError, match="line 2"):
+        next(messages)
+    assert describe_partition_file(fp)["malformed"] is True
+
+
+def test_undecodable_last_line_with_newline_raises(tmp_path):
+    # A complete (newline-terminated) line is never a torn write
+    fp = write_lines(tmp_path / "c.jsonl", '{"id": 1}\n{"id": \n')
+
+    with pytest.raises(MalformedPartitionError):
+        list(iter_ndjson_messages(fp))
+
+
+def read_ids(path):
+    return [m["message_id"] for m in iter_ndjson_messages(str(path))]
+
+
+def test_writer_commits_part_file_on_clean_close(tmp_path):
+    with open_channel_message_writer(str(tmp_path), "2024-01-01", "chan", flush_every=2) as sink:
+        for i in range(3):
+            sink.write({"message_id": i})
+        assert sink.path.endswith("chan.jsonl")
+        assert read_ids(sink.temp_path) == [0, 1]
+
+    assert read_ids(sink.path) == [0, 1, 2]
+    assert not os.path.exists(sink.temp_path)
+
+
+def test_writer_keeps_part_file_when_interrupted(tmp_path):
+    with pytest.raises(RuntimeError):
+        with open_channel_message_writer(str(tmp_path), "2024-01-01", "chan") as sink:
+            sink.write({"message_id": 1})
+            raise RuntimeError("killed")
+
+    assert not os.path.exists(sink.path)
+    assert read_ids(sink.temp_path) == [1]
+
+
+def test_resume_truncates_to_the_last_flushed_batch(tmp_path):
+    flushed = []
+    sink = open_channel_message_writer(str(tmp_path), "2024-01-01", "chan", flush_every=2,
+                                       on_flush=lambda batch: flushed.append(sink.bytes_written))
+    for i in range(4):
+        sink.write({"message_id": i})
+    resume_bytes = flushed[-1]
+    # A process killed mid-write leaves a torn tail past the recorded size
+    sink._file.write(b'{"message_id":4}\n{"message_')
+    sink._file.close()
+
+    with open_channel_message_writer(str(tmp_path), "2024-01-01", "chan", resume_bytes=resume_bytes) as resumed:
+        assert resumed.bytes_written == resume_bytes
+        resumed.write({"message_id": 4})
+
+    assert read_ids(resumed.path) == [0, 1, 2, 3, 4]
+
+
+def test_resume_after_commit_continues_the_partition_file(tmp_path):
+    with open_channel_message_writer(str(tmp_path), "2024-01-01", "chan") as sink:
+        sink.write({"message_id": 1})
+    with open_channel_message_writer(str(tmp_path), "2024-01-01", "chan",
+                                     resume_bytes=sink.bytes_written) as resumed:
+        resumed.write({"message_id": 2})
+
+    assert read_ids(resumed.path) == [1, 2]
+
+
+def test_stale_part_file_is_discarded_without_resume(tmp_path):
+    with pytest.raises(RuntimeError):
+        with open_channel_message_writer(str(tmp_path), "2024-01-01", "chan") as sink:
+            sink.write({"message_id": 1})
+            raise RuntimeError("killed")
+    with open_channel_message_writer(str(tmp_path), "2024-01-01", "chan") as fresh:
+        fresh.write({"message_id": 2})
+
+    assert read_ids(fresh.path) == [2]
@@ -0,0 +1,124 @@
+import os
+import csv
+import sys
+import asyncio
+import importlib
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("telethon")
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+# scripts/telegram.py validates credentials at import time; the replay client
+# never talks to Telegram, so placeholders are enough.
+os.environ.setdefault("Tg_API_ID", "0")
+os.environ.setdefault("Tg_API_HASH", "offline-test")
+
+from replay_client import ReplayTelegramClient, synthetic_history  # noqa: E402
+from src.datalake import iter_ndjson_messages, read_channel_checkpoints, read_run_progress  # noqa: E402
+
+HISTORY = 900
+LIMIT = 450
+
+
+@pytest.fixture(scope="module")
+def telegram(tmp_path_factory):
+    # telegram.py opens its log file under ./logs at import time
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("scraper"))
+    try:
+        return importlib.import_module("telegram")
+    finally:
+        os.chdir(cwd)
+
+
+def replay(flood_every=0):
+    return ReplayTelegramClient({"@chan": synthetic_history(HISTORY, photo_ratio=0)}, flood_every=flood_every)
+
+
+def scrape(telegram, client, base_path, limit=LIMIT):
+    return asyncio.run(telegram.scrape_all_channels(
+        client, ["@chan"], base_path, limit=limit, channel_delay=0,
+        request_rate=100, max_request_rate=100,
+        metrics_file=os.path.join(base_path, "scrape.prom"),
+    ))
+
+
+def partition_ids(base_path, date_str):
+    fp = os.path.join(base_path, "raw", "telegram_messages", date_str, "chan.jsonl")
+    return [m["message_id"] for m in iter_ndjson_messages(fp)]
+
+
+def csv_ids(base_path, date_str):
+    with open(os.path.join(base_path, "raw", "csv", date_str, "telegram_data.csv"), newline="",
+              encoding="utf-8") as f:
+        return [int(row["message_id"]) for row in csv.DictReader(f)]
+
+
+def test_failed_channel_resumes_without_gaps_or_duplicates(telegram, tmp_path):
+    base_path = str(tmp_path)
+    # Every third request floods: each retry writes one more page, until
+    # the fourth FloodWait exceeds max_retries with 400 of 450 written.
+    stats = scrape(telegram, replay(flood_every=3), base_path)
+    progress = read_run_progress(base_path)
+    date_str = progress["date"]
+    state = progress["channels"]["chan"]
+
+    assert stats["@chan"] == 400
+    assert state["status"] == "failed"
+    assert read_channel_checkpoints(base_path) == {}
+
+    stats = scrape(telegram, replay(), base_path)
+
+    expected = list(range(HISTORY, HISTORY - LIMIT, -1))
+    assert stats["@chan"] == LIMIT
+    assert partition_ids(base_path, date_str) == expected
+    assert sorted(csv_ids(base_path, date_str), reverse=True) == expected
+    assert read_run_progress(base_path) == {}
+    assert read_channel_checkpoints(base_path)["chan"]["last_message_id"] == HISTORY
+
+
+def test_failed_channel_is_given_up_after_resume_attempts(telegram, tmp_path):
+    base_path = str(tmp_path)
+    client = ReplayTelegramClient({"@chan": synthetic_history(10, photo_ratio=0)}, flood_every=1)
+    for attempt in range(1, telegram.DEFAULT_RESUME_ATTEMPTS + 1):
+        scrape(telegram, client, base_path)
+        if attempt < telegram.DEFAULT_RESUME_ATTEMPTS:
+            assert read_run_progress(base_path)["channels"]["chan"]["attempts"] == attempt
+
+    assert read_run_progress(base_path) == {}
+
+
+def test_csv_rows_are_on_disk_before_progress_moves(telegram, tmp_path, monkeypatch):
+    base_path = str(tmp_path)
+    record_progress = telegram.write_channel_progress
+    checked = []
+
+    def checking_progress(base_path, date_str, channel_name, **state):
+        if state["messages_written"]:
+            checked.append(state["messages_written"])
+            assert len(csv_ids(base_path, date_str)) == state["messages_written"]
+        record_progress(base_path, date_str, channel_name, **state)
+
+    monkeypatch.setattr(telegram, "write_channel_progress", checking_progress)
+    scrape(telegram, replay(), base_path)
+
+    assert checked and checked[-1] == LIMIT
+
+
+def test_resumed_channel_at_its_limit_completes(telegram, tmp_path):
+    base_path = str(tmp_path)
+    date_str = "2024-01-01"
+    resume = {"messages_written": 5, "last_offset_id": 6, "highest_id": 10, "bytes_written": 0}
+    with open(os.path.join(base_path, "rows.csv"), "w", newline="", encoding="utf-8") as f:
+        written = asyncio.run(telegram.scrape_channel(
+            replay(), "@chan", csv.writer(f), base_path, date_str, limit=5, channel_delay=0, resume=resume,
+        ))
+
+    assert written == 5
+    assert read_run_progress(base_path)["channels"]["chan"]["status"] == "complete"
+    assert read_channel_checkpoints(base_path)["chan"]["last_message_id"] == 10